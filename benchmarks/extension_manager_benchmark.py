@@ -0,0 +1,110 @@
+# coding=utf-8
+
+import asyncio
+import inspect
+
+from xpaw.extension import ExtensionManager
+from xpaw.http import HttpRequest, HttpResponse, HttpHeaders
+
+from benchmarks.utils import log_time
+
+
+class SyncExtension:
+    def handle_request(self, request):
+        pass
+
+    def handle_response(self, request, response):
+        pass
+
+
+class AsyncExtension:
+    async def handle_request(self, request):
+        pass
+
+    async def handle_response(self, request, response):
+        pass
+
+
+class BaselineExtensionManager(ExtensionManager):
+    """
+    The handler loops before the chains are compiled,
+    which check the result by ``iscoroutine`` and validate it by ``assert`` on every call.
+    """
+
+    async def handle_request(self, request):
+        if not isinstance(request.headers, HttpHeaders):
+            request.headers = HttpHeaders(request.headers)
+        for method in self._request_handlers:
+            res = method(request)
+            if inspect.iscoroutine(res):
+                res = await res
+            assert res is None or isinstance(res, (HttpRequest, HttpResponse)), \
+                "Request handler must return None, HttpRequest or HttpResponse, got {}".format(type(res).__name__)
+            if res:
+                return res
+
+    async def handle_response(self, request, response):
+        for method in self._response_handlers:
+            res = method(request, response)
+            if inspect.iscoroutine(res):
+                res = await res
+            assert res is None or isinstance(res, HttpRequest), \
+                "Response handler must return None or HttpRequest, got {}".format(type(res).__name__)
+            if res:
+                return res
+
+
+def prepare_benchmark_data(total=0):
+    return [HttpRequest('http://localhost/{}'.format(i), headers=HttpHeaders()) for i in range(total)]
+
+
+async def run_handlers(ext, data):
+    for req in data:
+        await ext.handle_request(req)
+        await ext.handle_response(req, None)
+
+
+def run_benchmark(ext, data):
+    loop = asyncio.new_event_loop()
+    try:
+        loop.run_until_complete(run_handlers(ext, data))
+    finally:
+        loop.close()
+
+
+@log_time('baseline handler loops')
+def benchmark_baseline_loops(extensions, data):
+    run_benchmark(BaselineExtensionManager(*extensions), data)
+
+
+@log_time('compiled handler chains')
+def benchmark_compiled_chains(extensions, data):
+    run_benchmark(ExtensionManager(*extensions), data)
+
+
+@log_time('handler chains with validation (debug mode)')
+def benchmark_debug_chains(extensions, data):
+    run_benchmark(ExtensionManager(*extensions, debug=True), data)
+
+
+def main():
+    total = 200000
+    data = prepare_benchmark_data(total=total)
+    print('--------------------------------')
+    print('6 sync extensions    total: {}'.format(total))
+    print('--------------------------------')
+    extensions = [SyncExtension() for i in range(6)]
+    benchmark_baseline_loops(extensions, data)
+    benchmark_compiled_chains(extensions, data)
+    benchmark_debug_chains(extensions, data)
+    print('--------------------------------')
+    print('3 sync and 3 async extensions    total: {}'.format(total))
+    print('--------------------------------')
+    extensions = [SyncExtension() for i in range(3)] + [AsyncExtension() for i in range(3)]
+    benchmark_baseline_loops(extensions, data)
+    benchmark_compiled_chains(extensions, data)
+    benchmark_debug_chains(extensions, data)
+
+
+if __name__ == '__main__':
+    main()
@@ -1,9 +1,14 @@
 # coding=utf-8
 
 import random
+import asyncio
+import tracemalloc
 from queue import PriorityQueue
 from heapq import heappush, heappop
 
+from xpaw.http import HttpRequest
+from xpaw import queue
+
 from benchmarks.utils import log_time
 
 
@@ -58,6 +63,24 @@ def benchmark_list_heap_priority_queue(data):
             q.pop()
 
 
+def benchmark_memory_per_request(queue_cls, total):
+    async def push_requests(q):
+        for i in range(total):
+            await q.push(HttpRequest('http://localhost/{}'.format(i), priority=i % 10))
+
+    loop = asyncio.new_event_loop()
+    try:
+        q = queue_cls()
+        tracemalloc.start()
+        start = tracemalloc.get_traced_memory()[0]
+        loop.run_until_complete(push_requests(q))
+        size = tracemalloc.get_traced_memory()[0] - start
+        tracemalloc.stop()
+    finally:
+        loop.close()
+    print('The memory of {} per queued request: {:.1f} bytes'.format(queue_cls.__name__, size / total))
+
+
 def main():
     print('--------------------------------')
     print('push rate: 0.6    total: 1000000')
@@ -71,6 +94,11 @@ def main():
     data2 = prepare_benchmark_data(push_rate=0.8, total=1000000)
     benchmark_system_priority_queue(data2)
     benchmark_list_heap_priority_queue(data2)
+    print('--------------------------------')
+    print('queued requests    total: 100000')
+    print('--------------------------------')
+    benchmark_memory_per_request(queue.FifoQueue, 100000)
+    benchmark_memory_per_request(queue.PriorityQueue, 100000)
 
 
 if __name__ == '__main__':
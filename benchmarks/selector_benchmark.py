@@ -0,0 +1,84 @@
+# coding=utf-8
+
+from lxml import cssselect
+
+from xpaw.selector import Selector
+
+from benchmarks.utils import log_time
+
+css_translator = cssselect.LxmlHTMLTranslator()
+
+
+def prepare_benchmark_data(total=0):
+    items = ''.join('<div class="item"><a href="/item/{0}">item {0}</a><span class="price">{0}</span></div>'.format(i)
+                    for i in range(20))
+    return [Selector('<html><body><div id="content">{}</div></body></html>'.format(items)) for i in range(total)]
+
+
+def parse_uncached(selector):
+    root = selector.root
+    res = []
+    for item in root.xpath(css_translator.css_to_xpath('div.item'), smart_strings=False):
+        href = item.xpath(css_translator.css_to_xpath('a') + '/@href', smart_strings=False)
+        price = item.xpath('.//span[@class="price"]/text()', smart_strings=False)
+        res.append((href, price))
+    return res
+
+
+def parse_cached(selector):
+    res = []
+    for item in selector.css('div.item'):
+        href = item.css('a').xpath('@href')
+        price = item.xpath('.//span[@class="price"]/text()')
+        res.append((href, price))
+    return res
+
+
+def extract_with_selectors(selector):
+    items = selector.css('div.item')
+    return items.xpath('./a/@href').text, items.xpath('./span').text
+
+
+def extract_with_strings(selector):
+    items = selector.css('div.item')
+    return items.getall('./a/@href'), items.getall('./span')
+
+
+@log_time('translate and parse expressions on every call')
+def benchmark_uncached(data):
+    for s in data:
+        parse_uncached(s)
+
+
+@log_time('cached translations and compiled expressions')
+def benchmark_cached(data):
+    for s in data:
+        parse_cached(s)
+
+
+@log_time('extract values through selector objects')
+def benchmark_extract_with_selectors(data):
+    for s in data:
+        extract_with_selectors(s)
+
+
+@log_time('extract values as plain strings')
+def benchmark_extract_with_strings(data):
+    for s in data:
+        extract_with_strings(s)
+
+
+def main():
+    total = 10000
+    print('--------------------------------')
+    print('20 items per page    total: {}'.format(total))
+    print('--------------------------------')
+    data = prepare_benchmark_data(total=total)
+    benchmark_uncached(data)
+    benchmark_cached(data)
+    benchmark_extract_with_selectors(data)
+    benchmark_extract_with_strings(data)
+
+
+if __name__ == '__main__':
+    main()
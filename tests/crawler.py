@@ -1,10 +1,62 @@
 # coding=utf-8
 
+import asyncio
+
 from xpaw.eventbus import EventBus
 from xpaw.config import Config, DEFAULT_CONFIG
+from xpaw.stats import StatsCollector
+from xpaw.http import HttpResponse
+from xpaw.errors import ClientError
 
 
 class Crawler:
     def __init__(self, **kwargs):
         self.event_bus = EventBus()
         self.config = Config(DEFAULT_CONFIG, **kwargs)
+        self.stats_collector = StatsCollector()
+
+
+class LocalDownloader:
+    """
+    Return an empty response after a short delay without network,
+    the URLs ending with ``/slow`` take longer and the URLs ending with ``/error`` raise :class:`ClientError`.
+    """
+
+    max_clients = 4
+    instances = []
+
+    def __init__(self):
+        LocalDownloader.instances.append(self)
+        self.fetched = []
+        self.cancelled = []
+        self.in_flight = 0
+        self.max_in_flight = 0
+
+    async def fetch(self, request):
+        self.fetched.append(request.url)
+        self.in_flight += 1
+        self.max_in_flight = max(self.max_in_flight, self.in_flight)
+        try:
+            if request.url.endswith('/slow'):
+                await asyncio.sleep(0.1)
+            else:
+                await asyncio.sleep(0.01)
+            if request.url.endswith('/error'):
+                raise ClientError('not an error actually')
+            return HttpResponse(request.url, 200, body=b'')
+        except asyncio.CancelledError:
+            self.cancelled.append(request.url)
+            raise
+        finally:
+            self.in_flight -= 1
+
+
+class LocalResponseExtension:
+    def handle_request(self, request):
+        return HttpResponse(request.url, 200, body=b'')
+
+
+class SlowLocalResponseExtension:
+    async def handle_request(self, request):
+        await asyncio.sleep(0.01)
+        return HttpResponse(request.url, 200, body=b'')
@@ -14,6 +14,8 @@ from xpaw.run import run_spider
 from xpaw.item import Item
 from xpaw.errors import IgnoreItem
 
+from .crawler import LocalDownloader, LocalResponseExtension, SlowLocalResponseExtension
+
 
 class StartRequestSpider(Spider):
     def start_requests(self):
@@ -251,3 +253,223 @@ class ToLoadSpider(Spider):
         data = self.config.get('data')
         data['url'] = response.request.url
         data['meta'] = response.meta
+
+
+class QuickSpider(Spider):
+    def start_requests(self):
+        for i in range(10):
+            yield HttpRequest('http://localhost/{}'.format(i))
+
+    def parse(self, response):
+        self.config.get('data').add(response.url)
+
+
+def test_stop_as_soon_as_done():
+    data = set()
+    t = time.time()
+    run_spider(QuickSpider, data=data, extensions=[LocalResponseExtension], downloader_clients=4)
+    assert time.time() - t < 3
+    assert len(data) == 10
+
+
+class StatsRecorder:
+    def __init__(self, crawler):
+        self.crawler = crawler
+
+    @classmethod
+    def from_crawler(cls, crawler):
+        return cls(crawler)
+
+    def close(self):
+        self.crawler.config.get('stats').update(self.crawler.stats_collector.stats)
+
+
+class ManyRequestsSpider(Spider):
+    def start_requests(self):
+        for i in range(100):
+            yield HttpRequest('http://localhost/{}'.format(i))
+
+    def parse(self, response):
+        self.config.get('data').add(response.url)
+
+
+def test_dynamic_workers():
+    data = set()
+    stats = {}
+    run_spider(QuickSpider, data=data, stats=stats, extensions=[StatsRecorder, LocalResponseExtension],
+               downloader_clients=100)
+    assert len(data) == 10
+    assert stats['worker_peak'] <= 10
+    assert 0 <= stats['worker_utilization'] <= 1
+
+    data = set()
+    stats = {}
+    run_spider(ManyRequestsSpider, data=data, stats=stats,
+               extensions=[StatsRecorder, SlowLocalResponseExtension], downloader_clients=8)
+    assert len(data) == 100
+    assert stats['worker_peak'] == 8
+    assert stats['worker_spawned'] >= 8
+
+
+class LatencySpider(Spider):
+    def start_requests(self):
+        for i in range(10):
+            yield HttpRequest('http://localhost/{}'.format(i))
+        yield HttpRequest('http://127.0.0.1/')
+
+    def parse(self, response):
+        # the scheduled time is not kept in meta
+        self.config.get('data').append(dict(response.meta))
+        yield {'url': response.url}
+
+
+def test_latency_histograms():
+    data = []
+    stats = {}
+    run_spider(LatencySpider, data=data, stats=stats, downloader=LocalDownloader, extensions=[StatsRecorder])
+    assert len(data) == 11 and all('_scheduled_time' not in i for i in data)
+    assert stats['download_time/count'] == 11
+    assert stats['download_time/localhost/count'] == 10
+    assert stats['download_time/127.0.0.1/count'] == 1
+    assert 0.01 <= stats['download_time/p50'] <= stats['download_time/p95'] <= stats['download_time/p99'] \
+        <= stats['download_time/max']
+    assert stats['queue_wait_time/count'] == 11
+    assert stats['parse_time/count'] == 11
+    assert stats['item_time/count'] == 11
+
+
+def test_latency_histograms_max_hosts():
+    stats = {}
+    run_spider(LatencySpider, data=[], stats=stats, downloader=LocalDownloader, extensions=[StatsRecorder],
+               stats_max_hosts=1)
+    assert stats['download_time/count'] == 11
+    assert stats['download_time/localhost/count'] == 10
+    assert 'download_time/127.0.0.1/count' not in stats
+
+
+class DupeRequestsSpider(Spider):
+    def start_requests(self):
+        for i in range(10):
+            yield HttpRequest('http://localhost/{}'.format(i % 5))
+
+    def parse(self, response):
+        yield {'url': response.url}
+
+
+def test_core_stats():
+    stats = {}
+    run_spider(DupeRequestsSpider, stats=stats, downloader=LocalDownloader, extensions=[StatsRecorder])
+    assert stats['request_count'] == 5
+    assert stats['request_dupe_count'] == 5
+    assert stats['response_count'] == 5
+    assert stats['response_status_count/200'] == 5
+    assert stats['item_count'] == 5
+    assert stats['elapsed_time'] > 0
+
+
+class AsyncStartRequestsSpider(Spider):
+    async def start_requests(self):
+        for i in range(3):
+            await asyncio.sleep(0)
+            yield HttpRequest('http://localhost/{}'.format(i))
+
+    def parse(self, response):
+        self.config.get('data').append((response.url, response.meta['depth']))
+
+
+class IdleSpider(Spider):
+    async def start_requests(self):
+        for i in range(3):
+            await asyncio.sleep(0.1)
+            yield HttpRequest('http://localhost/{}'.format(i))
+
+    def parse(self, response):
+        pass
+
+
+def test_idle_worker_utilization():
+    stats = {}
+    run_spider(IdleSpider, stats=stats, downloader=LocalDownloader, extensions=[StatsRecorder],
+               downloader_clients=4)
+    # most of the time there is no request to download
+    assert 0 < stats['worker_utilization'] < 0.2
+
+
+def test_async_start_requests():
+    data = []
+    run_spider(AsyncStartRequestsSpider, data=data, downloader=LocalDownloader)
+    assert sorted(data) == [('http://localhost/{}'.format(i), 0) for i in range(3)]
+
+
+class StreamingSpider(Spider):
+    def start_requests(self):
+        yield HttpRequest('http://localhost/', callback=self.parse)
+        yield HttpRequest('http://localhost/async', callback=self.async_parse)
+        yield HttpRequest('http://localhost/error', callback=self.error_parse)
+
+    def parse(self, response):
+        data = self.config.get('data')
+        n = len(self.crawler.queue)
+        for i in range(3):
+            yield HttpRequest('http://localhost/{}'.format(i), callback=self.parse_item)
+            data['sync'].append(len(self.crawler.queue) - n)
+
+    async def async_parse(self, response):
+        data = self.config.get('data')
+        n = len(self.crawler.queue)
+        for i in range(3):
+            yield HttpRequest('http://localhost/async/{}'.format(i), callback=self.parse_item)
+            data['async'].append(len(self.crawler.queue) - n)
+
+    def error_parse(self, response):
+        yield HttpRequest('http://localhost/error/0', callback=self.parse_item)
+        raise FooError
+
+    def parse_item(self, response):
+        self.config.get('data')['items'].add(response.url)
+
+
+class HandleFooErrorExtension:
+    def __init__(self, data):
+        self.data = data
+
+    @classmethod
+    def from_crawler(cls, crawler):
+        return cls(crawler.config.get('data'))
+
+    def handle_spider_error(self, response, error):
+        if isinstance(error, FooError):
+            self.data['error'] = response.url
+            return ()
+
+
+def test_streaming_spider_output():
+    data = {'sync': [], 'async': [], 'items': set()}
+    run_spider(StreamingSpider, data=data, extensions=[LocalResponseExtension, HandleFooErrorExtension],
+               downloader_clients=1)
+    # the request is scheduled as soon as it is yielded
+    assert data['sync'] == [1, 2, 3]
+    assert data['async'] == [1, 2, 3]
+    assert data['error'] == 'http://localhost/error'
+    assert data['items'] == {'http://localhost/0', 'http://localhost/1', 'http://localhost/2',
+                             'http://localhost/async/0', 'http://localhost/async/1', 'http://localhost/async/2',
+                             'http://localhost/error/0'}
+
+
+class ManyStartRequestsSpider(Spider):
+    def start_requests(self):
+        data = self.config.get('data')
+        for i in range(50):
+            data['queue_size'] = max(data['queue_size'], len(self.crawler.queue))
+            yield HttpRequest('http://localhost/{}'.format(i))
+
+    def parse(self, response):
+        self.config.get('data')['urls'].add(response.url)
+
+
+def test_start_requests_low_water_mark():
+    data = {'queue_size': 0, 'urls': set()}
+    run_spider(ManyStartRequestsSpider, data=data, extensions=[SlowLocalResponseExtension],
+               downloader_clients=2, start_requests_low_water_mark=5)
+    assert len(data['urls']) == 50
+    assert data['queue_size'] <= 5
@@ -1,7 +1,9 @@
 # coding=utf-8
 
+from os.path import join
+
 from xpaw.http import HttpRequest
-from xpaw.dupefilter import HashDupeFilter
+from xpaw.dupefilter import HashDupeFilter, SqliteDupeFilter
 from xpaw.utils import make_url
 
 
@@ -48,3 +50,22 @@ class TestHashDupeFilter:
         assert f.is_duplicated(r_get) is True
         f.clear()
         assert f.is_duplicated(r_get) is False
+
+
+class TestSqliteDupeFilter:
+    def test_is_duplicated(self, tmpdir):
+        f = SqliteDupeFilter(join(str(tmpdir), 'dupe.db'), batch_size=3)
+        run_any_dupe_filter(f)
+        f.close()
+
+    def test_persistence(self, tmpdir):
+        path = join(str(tmpdir), 'dupe.db')
+        f = SqliteDupeFilter(path)
+        r_get = HttpRequest("http://example.com")
+        assert f.is_duplicated(r_get) is False
+        f.close()
+        f = SqliteDupeFilter(path)
+        assert f.is_duplicated(r_get) is True
+        f.clear()
+        assert f.is_duplicated(r_get) is False
+        f.close()
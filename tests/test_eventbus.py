@@ -1,8 +1,11 @@
 # coding=utf-8
 
+import time
+import asyncio
+
 import pytest
 
-from xpaw.eventbus import EventBus
+from xpaw.eventbus import EventBus, CONCURRENT, QUEUED
 
 event1 = object()
 event2 = object()
@@ -149,3 +152,103 @@ async def test_del_weak_ref():
     await eventbus.send(event1)
     assert len(eventbus._refs[event1]) == 1
     assert obj1.count1 == 2
+
+
+class SlowClass:
+    def __init__(self):
+        self.values = []
+
+    async def slow_method(self, value):
+        await asyncio.sleep(0.05)
+        self.values.append(value)
+
+
+def test_unknown_mode():
+    eventbus = EventBus()
+    with pytest.raises(ValueError):
+        eventbus.subscribe(FooClass().method, event1, mode='unknown')
+
+
+@pytest.mark.asyncio
+async def test_concurrent_mode():
+    eventbus = EventBus()
+    objs = [SlowClass() for i in range(5)]
+    for obj in objs:
+        eventbus.subscribe(obj.slow_method, event1, mode=CONCURRENT)
+    start = time.time()
+    await eventbus.send(event1, value=1)
+    assert time.time() - start < 0.2
+    for obj in objs:
+        assert obj.values == [1]
+
+
+@pytest.mark.asyncio
+async def test_queued_mode():
+    eventbus = EventBus()
+    obj = SlowClass()
+    foo = FooClass()
+    eventbus.subscribe(obj.slow_method, event1, mode=QUEUED, buffer_size=2)
+    eventbus.subscribe(foo.method_raise_error, event2, mode=QUEUED)
+    start = time.time()
+    for i in range(4):
+        await eventbus.send(event1, value=i)
+    await eventbus.send(event2)
+    assert time.time() - start < 0.05
+    assert obj.values == []
+    await eventbus.flush()
+    assert obj.values == [0, 1]
+    stats = eventbus.subscriber_stats()
+    assert stats['SlowClass.slow_method']['count'] == 2
+    assert stats['SlowClass.slow_method']['dropped'] == 2
+    assert stats['SlowClass.slow_method']['max_time'] >= 0.05
+    assert stats['FooClass.method_raise_error']['count'] == 1
+    eventbus.close()
+
+
+@pytest.mark.asyncio
+async def test_subscriber_stats():
+    eventbus = EventBus()
+    obj = FooClass()
+    eventbus.subscribe(obj.method1, event1)
+    eventbus.subscribe(obj.method1, event2)
+    await eventbus.send(event1)
+    await eventbus.send(event2)
+    stats = eventbus.subscriber_stats()
+    assert stats['FooClass.method1']['count'] == 2
+    assert stats['FooClass.method1']['total_time'] >= stats['FooClass.method1']['max_time'] > 0
+
+
+@pytest.mark.asyncio
+async def test_has_subscribers():
+    eventbus = EventBus()
+    obj = FooClass()
+    assert eventbus.has_subscribers(event1) is False
+    eventbus.subscribe(obj.method1, event1)
+    assert eventbus.has_subscribers(event1) is True
+    assert eventbus.has_subscribers(event2) is False
+    eventbus.unsubscribe(obj.method1, event1)
+    assert eventbus.has_subscribers(event1) is False
+    eventbus.subscribe(obj.method1, event1)
+    del obj
+    assert eventbus.has_subscribers(event1) is False
+
+
+@pytest.mark.asyncio
+async def test_subscriber_cache():
+    eventbus = EventBus()
+    obj1 = FooClass()
+    obj2 = FooClass()
+    eventbus.subscribe(obj1.method1, event1)
+    await eventbus.send(event1)
+    subs = eventbus._cache[event1]
+    await eventbus.send(event1)
+    assert eventbus._cache[event1] is subs
+    eventbus.subscribe(obj2.method1, event1)
+    assert event1 not in eventbus._cache
+    await eventbus.send(event1)
+    assert obj1.count1 == 3 and obj2.count1 == 1
+    del obj2
+    assert event1 not in eventbus._cache
+    await eventbus.send(event1)
+    assert len(eventbus._cache[event1]) == 1
+    assert obj1.count1 == 4
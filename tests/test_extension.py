@@ -1,8 +1,11 @@
 # coding=utf-8
 
+import functools
+
 import pytest
 
 from xpaw.extension import ExtensionManager
+from xpaw.extensions import DepthMiddleware
 from xpaw import events
 from xpaw.http import HttpRequest, HttpResponse
 
@@ -255,3 +258,111 @@ async def test_item_pipeline_manager():
     await crawler.event_bus.send(events.crawler_shutdown)
     assert 'open' in data and 'close' in data
     assert data['handle_item'] is obj and data['async_handle_item'] is obj
+
+
+class BadReturnExtension:
+    def handle_request(self, request):
+        return 'bad'
+
+    async def handle_spider_input(self, response):
+        return 'bad'
+
+
+@pytest.mark.asyncio
+async def test_extension_debug_mode():
+    crawler = Crawler(extensions=[BadReturnExtension], default_extensions=None)
+    ext = ExtensionManager.from_crawler(crawler)
+    assert await ext.handle_request(HttpRequest('http://example.com')) == 'bad'
+    await ext.handle_spider_input(HttpResponse('http://example.com', 200))
+
+    crawler = Crawler(extensions=[BadReturnExtension], default_extensions=None, extension_debug=True)
+    ext = ExtensionManager.from_crawler(crawler)
+    with pytest.raises(AssertionError):
+        await ext.handle_request(HttpRequest('http://example.com'))
+    with pytest.raises(AssertionError):
+        await ext.handle_spider_input(HttpResponse('http://example.com', 200))
+
+
+@pytest.mark.asyncio
+async def test_compiled_handler_chains():
+    ext = ExtensionManager(DummyDownloadermw(), FooDownloadermw({}), FooAsyncDownloaderMw({}))
+    # the results of the synchronous handlers are checked on every call
+    assert [is_async for _, is_async in ext._request_chain] == [False, True]
+    assert [is_async for _, is_async in ext._response_chain] == [True, False]
+    ext = ExtensionManager(FooDownloadermw({}), FooAsyncDownloaderMw({}), debug=True)
+    assert [is_async for _, is_async in ext._request_chain] == [True, True]
+
+
+def returns_coroutine(func):
+    @functools.wraps(func)
+    def wrapper(*args, **kwargs):
+        return func(*args, **kwargs)
+
+    return wrapper
+
+
+class DecoratedAsyncExtension:
+    @returns_coroutine
+    async def handle_request(self, request):
+        return HttpResponse(request.url, 200)
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize('profiling', [False, True])
+async def test_decorated_async_handler(profiling):
+    ext = ExtensionManager(DecoratedAsyncExtension(), profiling=profiling)
+    for i in range(2):
+        resp = await ext.handle_request(HttpRequest('http://example.com'))
+        assert isinstance(resp, HttpResponse)
+
+
+class SometimesAsyncExtension:
+    def __init__(self):
+        self.calls = 0
+
+    def handle_request(self, request):
+        self.calls += 1
+        if self.calls % 2 == 0:
+            return self._handle_request(request)
+
+    async def _handle_request(self, request):
+        return HttpResponse(request.url, 200)
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize('profiling', [False, True])
+async def test_sometimes_async_handler(profiling):
+    ext = ExtensionManager(SometimesAsyncExtension(), profiling=profiling)
+    for i in range(4):
+        res = await ext.handle_request(HttpRequest('http://example.com'))
+        if i % 2 == 0:
+            assert res is None
+        else:
+            assert isinstance(res, HttpResponse)
+
+
+@pytest.mark.asyncio
+async def test_extension_profiling():
+    data = {}
+    crawler = Crawler(extensions=[lambda d=data: FooDownloadermw(d),
+                                  FooAsyncDownloaderMw],
+                      default_extensions=None,
+                      extension_profiling=True,
+                      data=data)
+    ext = ExtensionManager.from_crawler(crawler)
+    req = HttpRequest('http://example.com')
+    for i in range(10):
+        await ext.handle_request(req)
+    await ext.handle_response(req, HttpResponse('http://example.com', 200))
+    await crawler.event_bus.send(events.crawler_shutdown)
+    assert data['handle_request'] is req and data['async_handle_request'] is req
+    stats = crawler.stats_collector
+    assert stats.get('extension/FooDownloadermw.handle_request/count') == 10
+    assert stats.get('extension/FooAsyncDownloaderMw.handle_request/count') == 10
+    assert stats.get('extension/FooAsyncDownloaderMw.handle_response/count') == 1
+    assert stats.get('extension/FooDownloadermw.handle_error/count') is None
+    # the handlers returning lazy iterators are not profiled
+    assert ExtensionManager(DepthMiddleware(), profiling=True).profiles == []
+    assert stats.get('extension/FooDownloadermw.handle_request/total_time') > 0
+    assert stats.get('extension/FooDownloadermw.handle_request/p50') <= \
+           stats.get('extension/FooDownloadermw.handle_request/p99')
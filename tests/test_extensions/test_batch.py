@@ -0,0 +1,108 @@
+# coding=utf-8
+
+import sqlite3
+import asyncio
+from os.path import join
+
+import pytest
+
+from xpaw.extensions import BatchItemPipeline
+from xpaw import events
+
+from ..crawler import Crawler
+
+
+class SqliteSink(BatchItemPipeline):
+    def __init__(self, db_path, **kwargs):
+        super().__init__(**kwargs)
+        self.db = sqlite3.connect(db_path)
+        self.db.execute('CREATE TABLE item (name TEXT, price REAL)')
+        self.batches = []
+
+    @classmethod
+    def _params_from_config(cls, config):
+        params = super()._params_from_config(config)
+        params['db_path'] = config['db_path']
+        return params
+
+    def handle_items(self, items):
+        self.batches.append(len(items))
+        with self.db:
+            self.db.executemany('INSERT INTO item VALUES (?, ?)', [(i['name'], i['price']) for i in items])
+
+    def count(self):
+        return self.db.execute('SELECT COUNT(*) FROM item').fetchone()[0]
+
+
+class SlowSink(BatchItemPipeline):
+    def __init__(self, **kwargs):
+        super().__init__(**kwargs)
+        self.in_flight = 0
+        self.max_in_flight = 0
+        self.items = []
+
+    async def handle_items(self, items):
+        self.in_flight += 1
+        self.max_in_flight = max(self.max_in_flight, self.in_flight)
+        await asyncio.sleep(0.05)
+        self.items += items
+        self.in_flight -= 1
+
+
+class TestBatchItemPipeline:
+    def test_value_error(self):
+        with pytest.raises(ValueError):
+            SlowSink(batch_size=0)
+        with pytest.raises(ValueError):
+            SlowSink(max_in_flight_batches=0)
+
+    @pytest.mark.asyncio
+    async def test_sqlite_sink(self, tmpdir):
+        crawler = Crawler(db_path=join(str(tmpdir), 'items.db'), item_batch_size=10)
+        sink = SqliteSink.from_crawler(crawler)
+        sink.open()
+        for i in range(25):
+            await sink.handle_item({'name': str(i), 'price': i})
+        await asyncio.sleep(0.01)
+        assert sink.count() == 20
+        # the remaining items are handled on crawler_shutdown
+        await crawler.event_bus.send(events.crawler_shutdown)
+        sink.close()
+        assert sink.count() == 25
+        assert sink.batches == [10, 10, 5]
+
+    @pytest.mark.asyncio
+    async def test_batch_timeout(self):
+        sink = SlowSink(batch_size=100, batch_timeout=0.05)
+        sink.open()
+        await sink.handle_item(1)
+        await sink.handle_item(2)
+        assert sink.items == []
+        await asyncio.sleep(0.2)
+        assert sink.items == [1, 2]
+        sink.close()
+
+    @pytest.mark.asyncio
+    async def test_backpressure(self):
+        sink = SlowSink(batch_size=2, batch_timeout=None, max_in_flight_batches=2, max_pending_items=6)
+        sink.open()
+        for i in range(6):
+            await sink.handle_item(i)
+        # the 6th item waits until a batch is handled
+        assert len(sink.items) >= 2
+        for i in range(6, 20):
+            await sink.handle_item(i)
+        await sink.flush()
+        assert sorted(sink.items) == list(range(20))
+        assert sink.max_in_flight == 2
+        sink.close()
+
+    @pytest.mark.asyncio
+    async def test_handle_items_error(self):
+        class ErrorSink(BatchItemPipeline):
+            def handle_items(self, items):
+                raise RuntimeError('not an error actually')
+
+        sink = ErrorSink(batch_size=1)
+        await sink.handle_item(1)
+        await sink.flush()
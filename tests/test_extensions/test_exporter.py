@@ -0,0 +1,164 @@
+# coding=utf-8
+
+import csv
+import gzip
+import json
+import asyncio
+import logging
+from os.path import join, exists
+
+import pytest
+
+from xpaw import events
+from xpaw.extensions import JsonLinesExporter, CsvExporter
+from xpaw.errors import NotEnabled
+from xpaw.item import Item, Field
+
+from ..crawler import Crawler
+
+
+class FooItem(Item):
+    name = Field()
+    price = Field(type='float')
+
+
+class TestJsonLinesExporter:
+    def test_not_enabled(self):
+        with pytest.raises(NotEnabled):
+            JsonLinesExporter.from_crawler(Crawler())
+
+    def test_value_error(self, tmpdir):
+        with pytest.raises(ValueError):
+            JsonLinesExporter(join(str(tmpdir), 'items.jsonl'), compression='unknown')
+        with pytest.raises(ValueError):
+            JsonLinesExporter(join(str(tmpdir), 'items.jsonl'), batch_size=0)
+
+    @pytest.mark.asyncio
+    async def test_export_items(self, tmpdir):
+        path = join(str(tmpdir), 'items.jsonl')
+        crawler = Crawler(feed_uri=path, feed_batch_size=2)
+        exporter = JsonLinesExporter.from_crawler(crawler)
+        exporter.open()
+        await exporter.handle_item({'name': '苹果', 'price': 1.0})
+        assert not exists(path)
+        await exporter.handle_item(FooItem(name='pear', price='2.5'))
+        await exporter.handle_item({'name': 'peach'})
+        await crawler.event_bus.send(events.crawler_shutdown)
+        exporter.close()
+        with open(path, 'rb') as f:
+            lines = [json.loads(i.decode('utf-8')) for i in f]
+        assert lines == [{'name': '苹果', 'price': 1.0}, {'name': 'pear', 'price': 2.5}, {'name': 'peach'}]
+        assert crawler.stats_collector.get('feed_exported_items') == 3
+
+    @pytest.mark.asyncio
+    async def test_flush_interval(self, tmpdir):
+        path = join(str(tmpdir), 'items.jsonl')
+        exporter = JsonLinesExporter(path, flush_interval=0.05)
+        exporter.open()
+        await exporter.handle_item({'name': 'apple'})
+        await asyncio.sleep(0.2)
+        assert exporter._buffer == [] and not exporter._pending
+        await exporter.drain()
+        with open(path, 'rb') as f:
+            assert json.loads(f.read().decode('utf-8')) == {'name': 'apple'}
+        exporter.close()
+
+    @pytest.mark.asyncio
+    async def test_drain_errors(self, tmpdir, caplog):
+        path = join(str(tmpdir), 'not_exists', 'items.jsonl')
+        exporter = JsonLinesExporter(path, flush_interval=0)
+        exporter.open()
+        await exporter.handle_item({'name': 'apple'})
+        with caplog.at_level(logging.ERROR, logger='xpaw.extensions.exporter'):
+            await exporter.drain()
+        assert 'Failed to write the items' in caplog.text
+        exporter.close()
+
+    @pytest.mark.asyncio
+    async def test_write_error_not_raised_by_other_items(self, tmpdir, caplog):
+        path = join(str(tmpdir), 'items.jsonl')
+        exporter = JsonLinesExporter(path, batch_size=1, flush_interval=0)
+        exporter.open()
+        write = exporter._file.write
+
+        def write_once(data):
+            exporter._file.write = write
+            raise OSError('disk full')
+
+        exporter._file.write = write_once
+        with caplog.at_level(logging.ERROR, logger='xpaw.extensions.exporter'):
+            await exporter.handle_item({'name': 'apple'})
+            await asyncio.sleep(0.1)
+            await exporter.handle_item({'name': 'pear'})
+            assert 'disk full' in caplog.text
+            await exporter.drain()
+        exporter.close()
+        with open(path, 'rb') as f:
+            assert [json.loads(i.decode('utf-8')) for i in f] == [{'name': 'pear'}]
+
+    @pytest.mark.asyncio
+    async def test_gzip(self, tmpdir):
+        path = join(str(tmpdir), 'items.jsonl.gz')
+        exporter = JsonLinesExporter(path, compression='gzip')
+        exporter.open()
+        for i in range(10):
+            await exporter.handle_item({'index': i})
+        exporter.close()
+        with gzip.open(path, 'rb') as f:
+            assert [json.loads(i.decode('utf-8'))['index'] for i in f] == list(range(10))
+
+    @pytest.mark.asyncio
+    async def test_rotation(self, tmpdir):
+        path = join(str(tmpdir), 'items-{index}.jsonl')
+        exporter = JsonLinesExporter(path, batch_size=10, max_file_size=100)
+        exporter.open()
+        for i in range(100):
+            await exporter.handle_item({'index': i})
+        exporter.close()
+        res = []
+        n = 0
+        while exists(path.format(index=n)):
+            with open(path.format(index=n), 'rb') as f:
+                res += [json.loads(i.decode('utf-8'))['index'] for i in f]
+            n += 1
+        assert n > 1
+        assert res == list(range(100))
+
+
+class TestCsvExporter:
+    @pytest.mark.asyncio
+    async def test_export_items(self, tmpdir):
+        path = join(str(tmpdir), 'items.csv')
+        exporter = CsvExporter.from_crawler(Crawler(feed_uri=path, feed_max_file_size=30, feed_batch_size=1))
+        exporter.open()
+        await exporter.handle_item(FooItem(name='apple'))
+        await exporter.handle_item(FooItem(name='pear', price=2.5))
+        await exporter.handle_item({'price': 3, 'name': 'peach, "big"'})
+        exporter.close()
+        with open(path, 'r', encoding='utf-8', newline='') as f:
+            assert list(csv.reader(f)) == [['name', 'price'], ['apple', ''], ['pear', '2.5']]
+        with open(path + '.1', 'r', encoding='utf-8', newline='') as f:
+            assert list(csv.reader(f)) == [['name', 'price'], ['peach, "big"', '3']]
+
+    @pytest.mark.asyncio
+    async def test_fields(self, tmpdir):
+        path = join(str(tmpdir), 'items.csv')
+        exporter = CsvExporter.from_crawler(Crawler(feed_uri=path, feed_fields='price'))
+        exporter.open()
+        await exporter.handle_item({'name': 'apple', 'price': 1})
+        exporter.close()
+        with open(path, 'r', encoding='utf-8', newline='') as f:
+            assert list(csv.reader(f)) == [['price'], ['1']]
+
+
+@pytest.mark.asyncio
+async def test_zstd(tmpdir):
+    zstandard = pytest.importorskip('zstandard')
+    path = join(str(tmpdir), 'items.jsonl.zst')
+    exporter = JsonLinesExporter(path, compression='zstd')
+    exporter.open()
+    await exporter.handle_item({'name': 'apple'})
+    exporter.close()
+    with open(path, 'rb') as f:
+        data = zstandard.ZstdDecompressor().stream_reader(f).read()
+    assert json.loads(data.decode('utf-8')) == {'name': 'apple'}
@@ -0,0 +1,89 @@
+# coding=utf-8
+
+import pytest
+from tornado.httpclient import AsyncHTTPClient
+
+from xpaw.extensions import MetricsServer
+from xpaw.errors import NotEnabled
+from xpaw.http import HttpRequest, HttpResponse
+from xpaw.queue import FifoQueue
+from xpaw import events
+
+from ..crawler import Crawler
+
+
+class FakeRunner:
+    workers = 2
+    in_flight = 2
+    max_workers = 8
+    worker_utilization = 0.25
+
+
+class TestMetricsServer:
+    def test_not_enabled(self):
+        with pytest.raises(NotEnabled):
+            MetricsServer.from_crawler(Crawler())
+
+    @pytest.mark.asyncio
+    async def test_render(self):
+        crawler = Crawler(metrics_port=0)
+        crawler.queue = FifoQueue()
+        await crawler.queue.push(HttpRequest('http://example.com'))
+        server = MetricsServer.from_crawler(crawler)
+        stats = crawler.stats_collector
+        stats.set('worker_spawned', 3)
+        stats.set('name', 'not a number')
+        stats.observe('download_time', 0.1)
+        stats.observe('download_time/example.com', 0.1)
+        stats.set('download_time/count', 1)
+        await crawler.event_bus.send(events.response_received,
+                                     response=HttpResponse('http://example.com/', 200))
+        text = server.render()
+        lines = text.splitlines()
+        assert '# TYPE xpaw_queue_size gauge' in lines
+        assert 'xpaw_queue_size 1.0' in lines
+        assert 'xpaw_worker_spawned 3.0' in lines
+        assert 'xpaw_name' not in text
+        assert '# TYPE xpaw_download_time summary' in lines
+        assert 'xpaw_download_time_count 1' in lines
+        assert 'xpaw_download_time_count{host="example.com"} 1' in lines
+        assert any(i.startswith('xpaw_download_time{quantile="0.99"} 0.1') for i in lines)
+        assert any(i.startswith('xpaw_download_time{host="example.com",quantile="0.5"} ') for i in lines)
+        assert any(i.startswith('xpaw_responses_per_second{host="example.com"} ') for i in lines)
+        assert 'xpaw_worker_utilization' not in text
+        # each metric has only one TYPE line
+        types = [i.split()[2] for i in lines if i.startswith('# TYPE')]
+        assert len(types) == len(set(types))
+
+    def test_render_runner(self):
+        crawler = Crawler(metrics_port=0)
+        crawler.runner = FakeRunner()
+        lines = MetricsServer.from_crawler(crawler).render().splitlines()
+        assert 'xpaw_workers 2.0' in lines
+        assert 'xpaw_in_flight_requests 2.0' in lines
+        assert 'xpaw_worker_utilization 0.25' in lines
+
+    @pytest.mark.asyncio
+    async def test_max_hosts(self):
+        crawler = Crawler(metrics_port=0)
+        crawler.stats_collector.max_hosts = 1
+        server = MetricsServer.from_crawler(crawler)
+        for url in ('http://a.com/', 'http://b.com/', 'http://a.com/1'):
+            await crawler.event_bus.send(events.response_received, response=HttpResponse(url, 200))
+        assert set(crawler.stats_collector.rates) == {'responses/a.com'}
+        assert 'host="b.com"' not in server.render()
+
+    @pytest.mark.asyncio
+    async def test_serve(self):
+        crawler = Crawler(metrics_port=0)
+        server = MetricsServer.from_crawler(crawler)
+        crawler.stats_collector.set('worker_spawned', 3)
+        server.open()
+        try:
+            assert server.port > 0
+            resp = await AsyncHTTPClient().fetch('http://127.0.0.1:{}/metrics'.format(server.port))
+            assert resp.code == 200
+            assert resp.headers['Content-Type'].startswith('text/plain')
+            assert 'xpaw_worker_spawned 3.0' in resp.body.decode('utf-8').splitlines()
+        finally:
+            server.close()
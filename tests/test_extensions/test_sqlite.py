@@ -0,0 +1,41 @@
+# coding=utf-8
+
+import sqlite3
+from os.path import join
+
+import pytest
+
+from xpaw.extensions import SqliteItemPipeline
+from xpaw.errors import NotEnabled
+from xpaw.item import Item, Field
+from xpaw import events
+
+from ..crawler import Crawler
+
+
+class ProductItem(Item):
+    name = Field()
+    price = Field(type='float')
+
+
+class TestSqliteItemPipeline:
+    def test_not_enabled(self):
+        with pytest.raises(NotEnabled):
+            SqliteItemPipeline.from_crawler(Crawler())
+
+    @pytest.mark.asyncio
+    async def test_handle_items(self, tmpdir):
+        path = join(str(tmpdir), 'items.db')
+        crawler = Crawler(sqlite_path=path, sqlite_item_table='product', item_batch_size=10)
+        pipeline = SqliteItemPipeline.from_crawler(crawler)
+        pipeline.open()
+        for i in range(25):
+            await pipeline.handle_item(ProductItem(name=str(i), price=i))
+        await crawler.event_bus.send(events.crawler_shutdown)
+        pipeline.close()
+        conn = sqlite3.connect(path)
+        assert conn.execute('PRAGMA journal_mode').fetchone()[0] == 'wal'
+        rows = conn.execute("SELECT type, json_extract(data, '$.name'), json_extract(data, '$.price') "
+                            "FROM product ORDER BY id").fetchall()
+        assert rows == [('ProductItem', str(i), float(i)) for i in range(25)]
+        conn.close()
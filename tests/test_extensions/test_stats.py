@@ -0,0 +1,87 @@
+# coding=utf-8
+
+import logging
+
+import pytest
+
+from xpaw.extensions import CoreStats, StatsReporter
+from xpaw.errors import NotEnabled, IgnoreRequest, IgnoreItem
+from xpaw.http import HttpRequest, HttpResponse
+from xpaw.queue import FifoQueue
+from xpaw import events
+
+from ..crawler import Crawler
+
+
+class TestCoreStats:
+    def test_not_enabled(self):
+        with pytest.raises(NotEnabled):
+            CoreStats.from_crawler(Crawler(core_stats_enabled=False))
+
+    @pytest.mark.asyncio
+    async def test_handle_events(self, caplog):
+        crawler = Crawler()
+        core_stats = CoreStats.from_crawler(crawler)
+        core_stats.open()
+        bus = crawler.event_bus
+        req = HttpRequest('http://example.com')
+        await bus.send(events.request_scheduled, request=req)
+        await bus.send(events.request_scheduled, request=HttpRequest('http://example.com', meta={'retry_times': 1}))
+        # the meta of the request is not created
+        assert req._meta is None
+        await bus.send(events.request_duplicated, request=req)
+        await bus.send(events.request_ignored, request=req, error=IgnoreRequest())
+        await bus.send(events.response_received, response=HttpResponse('http://example.com', 200, body=b'abc'))
+        await bus.send(events.response_received, response=HttpResponse('http://example.com', 404))
+        await bus.send(events.item_scraped, item={})
+        await bus.send(events.item_ignored, item={}, error=IgnoreItem())
+        with caplog.at_level(logging.INFO, logger='xpaw.extensions.stats'):
+            core_stats.close()
+        stats = crawler.stats_collector.stats
+        assert stats['request_count'] == 2
+        assert stats['retry_count'] == 1
+        assert stats['request_dupe_count'] == 1
+        assert stats['request_ignored_count'] == 1
+        assert stats['response_count'] == 2
+        assert stats['response_status_count/200'] == 1
+        assert stats['response_status_count/404'] == 1
+        assert stats['response_bytes'] == 3
+        assert stats['item_count'] == 1
+        assert stats['item_ignored_count'] == 1
+        assert stats['elapsed_time'] >= 0
+        assert 'request_count: 2' in caplog.records[-1].getMessage()
+
+
+class TestStatsReporter:
+    def test_not_enabled(self):
+        with pytest.raises(NotEnabled):
+            StatsReporter.from_crawler(Crawler(stats_report_interval=0))
+
+    @pytest.mark.asyncio
+    async def test_report(self, caplog):
+        crawler = Crawler(stats_report_interval=10)
+        crawler.queue = FifoQueue()
+        crawler.runner = None
+        reporter = StatsReporter.from_crawler(crawler)
+        req = HttpRequest('http://example.com')
+        for i in range(3):
+            await crawler.event_bus.send(events.request_scheduled, request=req)
+        await crawler.queue.push(req)
+        await crawler.event_bus.send(events.response_received,
+                                     response=HttpResponse('http://example.com', 200, body=b'x' * 2048))
+        await crawler.event_bus.send(events.item_scraped, item={})
+        stats = crawler.stats_collector
+        assert stats.rates['requests'].total == 3
+        assert stats.rates['responses'].total == 1
+        assert stats.rates['response_bytes'].total == 2048
+        assert stats.rates['items'].total == 1
+        assert stats.get_rate('requests') > 0
+        with caplog.at_level(logging.INFO, logger='xpaw.extensions.stats'):
+            reporter.report()
+        msg = caplog.records[-1].getMessage()
+        assert 'Requests: 3' in msg
+        assert 'responses: 1' in msg
+        assert 'items: 1' in msg
+        assert 'downloaded: 2.0 KB' in msg
+        assert 'queue: 1' in msg
+        assert 'in-flight: 0' in msg
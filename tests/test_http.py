@@ -55,3 +55,104 @@ def test_replace_http_response():
     assert new_resp.url == 'https://example.com/'
     assert new_resp.status == 200
     assert new_resp.body == b'body2'
+
+
+def test_http_response_selector():
+    body = '<html><head><meta charset="gbk"></head><body><p class="a">中文</p></body></html>'.encode('gbk')
+    resp = HttpResponse('http://example.com/', 200, body=body, headers=HttpHeaders())
+    assert resp.selector is resp.selector
+    assert resp.xpath('//p').text == ['中文']
+    assert resp.css('p.a').text == ['中文']
+    resp = HttpResponse('http://example.com/', 200, body=body,
+                        headers=HttpHeaders({'Content-Type': 'text/html; charset=gbk'}))
+    assert resp.xpath('//p').text == ['中文']
+    resp = HttpResponse('http://example.com/', 200, body=body.decode('gbk'))
+    assert resp.xpath('//p').text == ['中文']
+    assert resp.replace().selector is not resp.selector
+
+
+def test_reuse_parser():
+    from lxml import etree
+    from xpaw.selector import create_root_node
+    root1 = create_root_node('<p>1</p>', etree.HTMLParser)
+    root2 = create_root_node('<p>2</p>', etree.HTMLParser)
+    assert root1.xpath('//p/text()') == ['1'] and root2.xpath('//p/text()') == ['2']
+    assert root1.getroottree().parser is root2.getroottree().parser
+
+
+def test_http_response_encoding():
+    html = '<html><head><meta charset="gbk"></head><body>中文</body></html>'
+    resp = HttpResponse('http://example.com/', 200, body=html.encode('gbk'), headers=HttpHeaders())
+    assert resp.encoding == 'gbk' and '中文' in resp.text
+    resp = HttpResponse('http://example.com/', 200, body=html.encode('gbk'),
+                        headers=HttpHeaders({'Content-Type': 'text/html; charset="GB18030"'}))
+    assert resp.encoding == 'GB18030'
+    resp = HttpResponse('http://example.com/', 200, body=html.encode('gbk'),
+                        headers=HttpHeaders({'Content-Type': 'text/html; charset=unknown'}))
+    assert resp.encoding == 'gbk'
+    resp = HttpResponse('http://example.com/', 200, body=html.encode('gbk'), encoding='gb18030')
+    assert resp.encoding == 'gb18030'
+    resp.encoding = None
+    assert resp.encoding == 'gbk'
+
+
+def test_http_response_encoding_from_bom():
+    body = '﻿<html><head><meta charset="gbk"></head><body>中文</body></html>'
+    for encoding, expected in [('utf-8', 'utf-8'), ('utf-16', 'utf-16'), ('utf-32', 'utf-32')]:
+        resp = HttpResponse('http://example.com/', 200, body=body.encode(encoding),
+                            headers=HttpHeaders({'Content-Type': 'text/html; charset=gbk'}))
+        assert resp.encoding == expected
+        assert resp.text == body[1:]
+
+
+def test_http_response_encoding_declared_in_prefix():
+    from xpaw.utils import ENCODING_SCAN_SIZE
+    html = '<html><head>{}<meta charset="gbk"></head><body>中文</body></html>'.format(' ' * ENCODING_SCAN_SIZE)
+    resp = HttpResponse('http://example.com/', 200, body=html.encode('gbk'))
+    assert resp.encoding != 'gbk'
+    resp = HttpResponse('http://example.com/', 200, body='<?xml version="1.0" encoding="gbk"?><p>中文</p>'.encode('gbk'))
+    assert resp.encoding == 'gbk'
+    resp = HttpResponse('http://example.com/', 200, body='<p>中文</p>'.encode('utf-8'))
+    assert resp.encoding == 'utf-8'
+    resp = HttpResponse('http://example.com/', 200, body=b'')
+    assert resp.encoding == 'utf-8' and resp.text == ''
+
+
+def test_lazy_meta_and_headers():
+    req = HttpRequest('http://example.com/')
+    assert not hasattr(req, '__dict__')
+    assert req._meta is None and req._headers is None
+    assert req.get_meta('depth', 0) == 0 and req._meta is None
+    assert req.meta == {}
+    req.meta['depth'] = 1
+    assert req.get_meta('depth') == 1
+    req = HttpRequest('http://example.com/', headers={'Accept': ['text/html', 'application/json'], 'X-Key': 'v'})
+    assert isinstance(req.headers, HttpHeaders)
+    assert req.headers.get_list('Accept') == ['text/html', 'application/json']
+    assert req.headers['X-Key'] == 'v'
+    req.headers = [('X-Key', 'v1'), ('X-Key', 'v2')]
+    assert req.headers.get_list('X-Key') == ['v1', 'v2']
+    resp = HttpResponse('http://example.com/', 200, headers={'Content-Type': 'text/html'})
+    assert not hasattr(resp, '__dict__')
+    assert isinstance(resp.headers, HttpHeaders) and resp.headers['Content-Type'] == 'text/html'
+    assert isinstance(HttpResponse('http://example.com/', 200).headers, HttpHeaders)
+
+
+def test_replace_shares_fields():
+    headers = HttpHeaders({'X-Key': 'v'})
+    req = HttpRequest('http://example.com/', headers=headers, meta={'depth': 1}, priority=2)
+    new_req = req.replace(priority=3, meta={'depth': 2})
+    assert new_req.headers is headers and new_req.priority == 3
+    assert new_req.meta == {'depth': 2} and req.meta == {'depth': 1}
+    new_req = req.replace(url='http://example.com/', params={'key': 'value'})
+    assert new_req.url == 'http://example.com/?key=value'
+
+    class MyRequest(HttpRequest):
+        pass
+
+    my_req = MyRequest('http://example.com/', meta={'depth': 1})
+    assert type(my_req.copy()) is MyRequest and my_req.copy().meta == {'depth': 1}
+
+    resp = HttpResponse('http://example.com/', 200, body=b'body', request=req)
+    new_resp = resp.replace(status=404)
+    assert new_resp.status == 404 and new_resp.body == b'body' and new_resp.request is req
@@ -45,12 +45,32 @@ class FieldTypeItem(Item):
 
 
 def test_field_type():
-    item = FieldTypeItem(str_field=1, int_field='1', float_field='1', bool_field='1', func_field='1', error_field='1')
+    item = FieldTypeItem(str_field=1, int_field='1', float_field='1', bool_field='1', func_field='1')
     assert item['none_field'] is None
     assert item['str_field'] == '1'
     assert isinstance(item['int_field'], int) and item['int_field'] == 1
     assert isinstance(item['float_field'], float) and item['float_field'] == 1
     assert item['bool_field'] is True
     assert isinstance(item['func_field'], int) and item['func_field'] == 1
+    assert isinstance(item.values['int_field'], int)
     with pytest.raises(ValueError):
-        item['error_field']
+        item['error_field'] = '1'
+    with pytest.raises(ValueError):
+        FieldTypeItem(error_field='1')
+
+
+class SlotsItem(Item):
+    __slots__ = ()
+
+    f1 = Field()
+    f3 = Field(type='int')
+
+
+def test_item_class_fields():
+    assert set(FooItem.fields) == {'f1', 'f2'}
+    assert set(SlotsItem.fields) == {'f1', 'f3'}
+    item = SlotsItem(f1='v1', f3='3')
+    assert not hasattr(item, '__dict__')
+    assert item['f3'] == 3 and item.fields is SlotsItem.fields
+    item_copy = item.copy()
+    assert type(item_copy) is SlotsItem and item_copy.values == {'f1': 'v1', 'f3': 3}
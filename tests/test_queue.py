@@ -1,11 +1,12 @@
 # coding=utf-8
 
 import asyncio
+from os.path import join
 
 import pytest
 import async_timeout
 
-from xpaw.queue import FifoQueue, LifoQueue, PriorityQueue
+from xpaw.queue import FifoQueue, LifoQueue, PriorityQueue, SqliteQueue
 from xpaw.http import HttpRequest
 
 
@@ -68,3 +69,60 @@ async def test_priority_queue():
     with pytest.raises(asyncio.TimeoutError):
         with async_timeout.timeout(0.1):
             await q.pop()
+
+
+@pytest.mark.asyncio
+async def test_sqlite_queue(tmpdir):
+    path = join(str(tmpdir), 'queue.db')
+    q = SqliteQueue(path, batch_size=2)
+    with pytest.raises(asyncio.TimeoutError):
+        with async_timeout.timeout(0.1):
+            await q.pop()
+    for url, priority in [('2_1', 2), ('1_1', 1), ('3_1', 3), ('1_2', 1), ('2_2', 2), ('3_2', 3)]:
+        await q.push(HttpRequest(url, priority=priority, meta={'url': url}))
+    assert len(q) == 6
+    r = await q.pop()
+    assert r.url == '3_1' and r.meta == {'url': '3_1'}
+    assert (await q.pop()).url == '3_2'
+    assert (await q.pop()).url == '2_1'
+    assert len(q) == 3
+    # the buffered requests are written back on close
+    q.close()
+    q = SqliteQueue(path, batch_size=2)
+    assert len(q) == 3
+    assert (await q.pop()).url == '2_2'
+    assert (await q.pop()).url == '1_1'
+    await q.push(HttpRequest('3_3', priority=3))
+    assert (await q.pop()).url == '3_3'
+    assert (await q.pop()).url == '1_2'
+    with pytest.raises(asyncio.TimeoutError):
+        with async_timeout.timeout(0.1):
+            await q.pop()
+    q.close()
+
+
+@pytest.mark.asyncio
+async def test_sqlite_queue_delete_after_pop(tmpdir):
+    path = join(str(tmpdir), 'queue.db')
+
+    def stored():
+        other = SqliteQueue(path)
+        n = len(other)
+        other.close()
+        return n
+
+    q = SqliteQueue(path, batch_size=2)
+    for i in range(4):
+        await q.push(HttpRequest(str(i)))
+    assert (await q.pop()).url == '0'
+    # the rows are kept until the requests are popped and the next batch is read
+    assert stored() == 4
+    assert (await q.pop()).url == '1'
+    assert stored() == 4
+    assert (await q.pop()).url == '2'
+    assert stored() == 2
+    q.close()
+    q = SqliteQueue(path)
+    assert len(q) == 1
+    assert (await q.pop()).url == '3'
+    q.close()
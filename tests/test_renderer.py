@@ -0,0 +1,114 @@
+# coding=utf-8
+
+import os
+import json
+import time
+import threading
+
+import pytest
+
+from xpaw.http import HttpRequest, HttpResponse, HttpHeaders
+from xpaw.renderer import ChromeRenderer, RenderCache
+
+
+def make_response(url, body):
+    headers = HttpHeaders()
+    headers.add('Content-Type', 'text/html')
+    return HttpResponse(url, 200, body=body, headers=headers)
+
+
+class TestRenderCache:
+    def test_get_and_set(self, tmpdir):
+        cache = RenderCache(str(tmpdir))
+        req = HttpRequest('http://example.com/')
+        assert cache.get(req, 'default') is None
+        cache.set(req, 'default', make_response('http://example.com/', b'<html></html>'))
+        resp = cache.get(req, 'default')
+        assert resp.url == 'http://example.com/' and resp.status == 200
+        assert resp.body == b'<html></html>'
+        assert resp.headers['Content-Type'] == 'text/html'
+        assert resp.request is req
+        assert cache.get(req, 'mobile') is None
+        assert cache.get(HttpRequest('http://example.com/', 'POST'), 'default') is None
+
+    def test_reload_from_disk(self, tmpdir):
+        req = HttpRequest('http://example.com/')
+        RenderCache(str(tmpdir)).set(req, 'default', make_response('http://example.com/', b'body'))
+        cache = RenderCache(str(tmpdir))
+        assert len(cache) == 1
+        assert cache.get(req, 'default').body == b'body'
+
+    def test_ttl(self, tmpdir):
+        cache = RenderCache(str(tmpdir), ttl=10)
+        req = HttpRequest('http://example.com/')
+        cache.set(req, 'default', make_response('http://example.com/', b'body'))
+        assert cache.get(req, 'default') is not None
+        path = os.path.join(str(tmpdir), cache.make_key(req, 'default'))
+        t = time.time() - 20
+        os.utime(path, (t, t))
+        assert cache.get(req, 'default') is None
+        assert len(cache) == 0 and not os.path.exists(path)
+
+    def test_file_removed_by_others(self, tmpdir):
+        cache = RenderCache(str(tmpdir), ttl=10)
+        req = HttpRequest('http://example.com/')
+        cache.set(req, 'default', make_response('http://example.com/', b'body'))
+        os.remove(os.path.join(str(tmpdir), cache.make_key(req, 'default')))
+        assert cache.get(req, 'default') is None
+        assert len(cache) == 0
+
+    def test_file_format(self, tmpdir):
+        cache = RenderCache(str(tmpdir))
+        req = HttpRequest('http://example.com/')
+        cache.set(req, 'default', make_response('http://example.com/', b'line1\nline2'))
+        with open(os.path.join(str(tmpdir), cache.make_key(req, 'default')), 'rb') as f:
+            header, body = f.read().split(b'\n', 1)
+        assert json.loads(header.decode('utf-8'))['status'] == 200
+        assert body == b'line1\nline2'
+        cache.set(req, 'default', HttpResponse('http://example.com/', 204))
+        assert cache.get(req, 'default').body is None
+
+    def test_max_size(self, tmpdir):
+        req1 = HttpRequest('http://example.com/1')
+        req2 = HttpRequest('http://example.com/2')
+        req3 = HttpRequest('http://example.com/3')
+        cache = RenderCache(str(tmpdir))
+        cache.set(req1, 'default', make_response(req1.url, b'x' * 1000))
+        size = cache.size
+        cache = RenderCache(str(tmpdir), max_size=size * 2)
+        cache.set(req2, 'default', make_response(req2.url, b'x' * 1000))
+        assert cache.get(req1, 'default') is not None
+        cache.set(req3, 'default', make_response(req3.url, b'x' * 1000))
+        assert len(cache) == 2 and cache.size <= size * 2
+        assert cache.get(req1, 'default') is not None
+        assert cache.get(req2, 'default') is None
+        assert cache.get(req3, 'default') is not None
+
+
+@pytest.mark.asyncio
+async def test_fetch_from_render_cache(tmpdir):
+    cache = RenderCache(str(tmpdir))
+    renderer = ChromeRenderer(cache=cache)
+    req = HttpRequest('http://example.com/', render=True)
+    cache.set(req, 'default', make_response('http://example.com/', b'rendered'))
+    resp = await renderer.fetch(req)
+    assert resp.body == b'rendered' and resp.request is req
+
+
+@pytest.mark.asyncio
+async def test_fetch_cache_off_the_loop(tmpdir, monkeypatch):
+    cache = RenderCache(str(tmpdir))
+    renderer = ChromeRenderer(cache=cache)
+    req = HttpRequest('http://example.com/', render=True)
+    cache.set(req, 'default', make_response('http://example.com/', b'rendered'))
+    threads = []
+    get = cache.get
+
+    def get_in_thread(*args):
+        threads.append(threading.get_ident())
+        return get(*args)
+
+    monkeypatch.setattr(cache, 'get', get_in_thread)
+    resp = await renderer.fetch(req)
+    assert resp.body == b'rendered'
+    assert threads and threads[0] != threading.get_ident()
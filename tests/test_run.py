@@ -5,10 +5,12 @@ from os.path import join
 import pytest
 
 from xpaw.spider import Spider
-from xpaw.run import run_spider, run_spider_project, make_requests
+from xpaw.run import run_spider, run_spider_project, make_requests, iter_requests
 from xpaw.http import HttpRequest, HttpResponse
 from xpaw.errors import ClientError, HttpError
 
+from .crawler import LocalDownloader
+
 spider_source = """# coding=utf-8
 
 from xpaw import Spider
@@ -80,3 +82,38 @@ def test_make_requests():
     assert isinstance(results[2], HttpResponse) and results[2].status == 200
     assert isinstance(results[3], HttpResponse) and results[3].status == 200
     assert isinstance(results[4], HttpError) and results[4].response.status == 404
+
+
+def test_iter_requests():
+    taken = []
+
+    def requests():
+        yield 'http://localhost/slow'
+        yield None
+        yield 'http://localhost/error'
+        for i in range(100):
+            taken.append(i)
+            yield HttpRequest('http://localhost/{}'.format(i))
+
+    results = {}
+    it = iter_requests(requests(), max_in_flight=2, downloader=LocalDownloader, max_retry_times=0)
+    for i, res in it:
+        # the requests are taken lazily
+        assert len(taken) <= len(results) + 2
+        results[i] = res
+    assert len(results) == 102
+    assert results[0].url == 'http://localhost/slow'
+    assert isinstance(results[2], ClientError)
+    assert results[52].url == 'http://localhost/49'
+
+
+def test_iter_requests_break():
+    LocalDownloader.instances = []
+    it = iter_requests(['http://localhost/slow', 'http://localhost/'], downloader=LocalDownloader)
+    i, res = next(it)
+    assert i == 1
+    it.close()
+    # the slow request is cancelled
+    downloader = LocalDownloader.instances[-1]
+    assert downloader.cancelled == ['http://localhost/slow']
+    assert downloader.in_flight == 0
@@ -138,3 +138,140 @@ class TestXmlText:
         xml = """expression: <var>x</var>+<var>y</var>=<var>z</var>"""
         with pytest.raises(XMLSyntaxError):
             xs = Selector(xml, text_type='xml')
+
+
+class TestIterparse:
+    sitemap = b"""<?xml version="1.0" encoding="UTF-8"?>
+<urlset xmlns="http://www.sitemaps.org/schemas/sitemap/0.9">
+<url><loc>http://example.com/1</loc></url>
+<url><loc>http://example.com/2</loc></url>
+<group><url><loc>http://example.com/3</loc></url></group>
+</urlset>"""
+
+    def test_iterparse_nested(self):
+        html = b'<html><body><div id="a"><div id="b">inner</div>outer</div><div id="c">next</div></body></html>'
+        res = [(s.attr('id'), s.text) for s in Selector.iterparse(html, 'div', text_type='html')]
+        assert res == [('b', 'inner'), ('a', 'innerouter'), ('c', 'next')]
+        xml = b'<rss><channel><title>t</title><item>i</item></channel></rss>'
+        res = [(s.root.tag, s.text) for s in Selector.iterparse(xml, '*')]
+        assert res == [('title', 't'), ('item', 'i'), ('channel', 'ti'), ('rss', 'ti')]
+
+    def test_iterparse_tag(self):
+        res = [s.xpath('./*[local-name()="loc"]')[0].text for s in Selector.iterparse(self.sitemap, 'url')]
+        assert res == ['http://example.com/1', 'http://example.com/2', 'http://example.com/3']
+        res = [s.text for s in Selector.iterparse(self.sitemap, '{http://www.sitemaps.org/schemas/sitemap/0.9}loc')]
+        assert res == ['http://example.com/1', 'http://example.com/2', 'http://example.com/3']
+        assert list(Selector.iterparse(self.sitemap, '{http://example.com}loc')) == []
+
+    def test_iterparse_path(self):
+        assert [s.text for s in Selector.iterparse(self.sitemap, 'urlset/url')] == \
+               ['http://example.com/1', 'http://example.com/2']
+        assert [s.text for s in Selector.iterparse(self.sitemap, 'group/url/loc')] == ['http://example.com/3']
+        assert [s.text for s in Selector.iterparse(self.sitemap, '/urlset/*/url/loc')] == ['http://example.com/3']
+        assert [s.text for s in Selector.iterparse(self.sitemap, '/url/loc')] == []
+
+    def test_iterparse_file(self, tmpdir):
+        path = str(tmpdir.join('sitemap.xml'))
+        with open(path, 'wb') as f:
+            f.write(self.sitemap)
+        assert len(list(Selector.iterparse(path, 'loc'))) == 3
+        with open(path, 'rb') as f:
+            assert len(list(Selector.iterparse(f, 'loc'))) == 3
+
+    def test_clear_processed_elements(self):
+        xml = b'<items>' + b''.join('<item><id>{}</id></item>'.format(i).encode() for i in range(100)) + b'</items>'
+        n = 0
+        for s in Selector.iterparse(xml, 'item'):
+            assert s.xpath('./id')[0].text == str(n)
+            assert s.type == 'xml'
+            # the processed elements are cleared and removed from the tree
+            prev = s.root.getprevious()
+            assert prev is None or (len(prev) == 0 and prev.getprevious() is None)
+            n += 1
+        assert n == 100
+
+    def test_iterparse_html(self):
+        html = b'<html><body><ul><li>a</li><li>b</li></ul><li>c</li></body></html>'
+        assert [s.text for s in Selector.iterparse(html, 'ul/li', text_type='html')] == ['a', 'b']
+        with pytest.raises(ValueError):
+            list(Selector.iterparse(html, 'li', text_type='json'))
+
+
+class TestXPathCache:
+    def test_xpath_variables(self):
+        s = Selector('<p class="a">a</p><p class="b">b</p>')
+        assert s.xpath('//p[@class=$cls]', cls='b').text == ['b']
+        assert s.xpath('//p[@class=$cls]', cls='a').text == ['a']
+        assert s.xpath('count(//p)')[0].text == '2.0'
+
+    def test_xpath_namespaces(self):
+        xml = '<root xmlns:x="http://example.com/x"><x:p>x</x:p><p>p</p></root>'
+        s = Selector(xml, text_type='xml')
+        assert s.xpath('//x:p', namespaces={'x': 'http://example.com/x'}).text == ['x']
+        assert s.xpath('//y:p', namespaces={'y': 'http://example.com/x'}).text == ['x']
+
+    def test_shared_compiled_xpath(self):
+        from xpaw.selector import _get_xpath_evaluator, _css_to_xpath
+        assert _get_xpath_evaluator('//p') is _get_xpath_evaluator('//p')
+        assert _get_xpath_evaluator('//p') is not _get_xpath_evaluator('//p', smart_strings=True)
+        assert _css_to_xpath('html', 'p.a') is _css_to_xpath('html', 'p.a')
+        s1 = Selector('<p>1</p>')
+        s2 = Selector('<p>2</p>')
+        assert s1.css('p').text == ['1'] and s2.css('p').text == ['2']
+
+    def test_compiled_xpath_in_threads(self):
+        from concurrent.futures import ThreadPoolExecutor
+        s = Selector('<ul>' + ''.join('<li>{}</li>'.format(i) for i in range(100)) + '</ul>')
+
+        def select(i):
+            return Selector(s.string).xpath('//li[$i]', i=i + 1).text
+
+        with ThreadPoolExecutor(max_workers=4) as executor:
+            assert list(executor.map(select, range(100))) == [[str(i)] for i in range(100)]
+
+
+class TestExtraction:
+    html = """<ul><li class="a"><a href="/1">one</a> 1.0</li><li><a href="/2">two</a> 2.5</li><li>none</li></ul>
+<table><tr><th>name</th><th>price</th></tr><tr><td>apple</td><td>1.0</td></tr><tr><td>pear</td><td>2.5</td></tr></table>"""
+
+    def test_selector_get(self):
+        s = Selector(self.html)
+        assert s.getall('//li/a/@href') == ['/1', '/2']
+        assert s.getall('//li/a') == ['one', 'two']
+        assert s.getall('//li[@class=$cls]/a', cls='a') == ['one']
+        assert s.get('//li/a/@href') == '/1'
+        assert s.get('//p') is None
+        assert s.get('//p', default='') == ''
+        assert s.get('count(//li)') == '3.0'
+
+    def test_selector_re(self):
+        s = Selector(self.html)
+        assert s.re(r'\d+\.\d+') == ['1.0', '2.5', '1.0', '2.5']
+        assert s.re(r'(\w+) (\d+)\.\d+', xpath='//li') == ['one', '1', 'two', '2']
+        assert s.xpath('//li')[0].re(r'\d+\.\d+') == ['1.0']
+
+    def test_selector_list_get(self):
+        items = Selector(self.html).xpath('//li')
+        assert items.getall('./a/@href') == ['/1', '/2']
+        assert items.get('./a/text()') == 'one'
+        assert items[2:].get('./a/text()') is None
+        assert items.re(r'\d+\.\d+') == ['1.0', '2.5']
+        assert items.re(r'/(\d+)', xpath='./a/@href') == ['1', '2']
+
+    def test_attrs(self):
+        s = Selector(self.html)
+        assert s.xpath('//li').attrs('class') == ['a', None, None]
+        assert s.xpath('//li/a').attrs('href') == s.xpath('//li/a').attr('href') == ['/1', '/2']
+        assert s.xpath('//li')[0].attr('class') == 'a'
+        assert s.xpath('//li')[1].attr('class') is None
+        assert s.xpath('//li/a/@href').attrs('href') == [None, None]
+        xml = '<root xmlns:x="http://example.com/x"><p x:id="1" id="2"/></root>'
+        p = Selector(xml, text_type='xml').xpath('//p')
+        assert p.attrs('id') == ['2']
+        assert p[0].xpath('@x:id', namespaces={'x': 'http://example.com/x'}).text == ['1']
+
+    def test_extract_table(self):
+        s = Selector(self.html)
+        assert s.xpath('//table').extract_table() == [['name', 'price'], ['apple', '1.0'], ['pear', '2.5']]
+        assert s.xpath('//table').extract_table(row_xpath='.//tr[td]', cell_xpath='./td[1]') == [['apple'], ['pear']]
+        assert s.xpath('//ul').extract_table() == []
@@ -0,0 +1,70 @@
+# coding=utf-8
+
+import pytest
+
+from xpaw.session import Session
+from xpaw.http import HttpRequest, HttpResponse
+from xpaw.errors import ClientError
+
+from .crawler import LocalDownloader
+
+
+class TestSession:
+    @pytest.mark.asyncio
+    async def test_fetch(self):
+        LocalDownloader.instances = []
+        async with Session(downloader=LocalDownloader, max_retry_times=2) as session:
+            downloader = session.crawler.downloader
+            resp = await session.fetch('http://localhost/')
+            assert isinstance(resp, HttpResponse) and resp.status == 200
+            assert resp.request.url == 'http://localhost/'
+            resp = await session.fetch(HttpRequest('http://localhost/1'))
+            assert resp.url == 'http://localhost/1'
+            # retried by the extension in place
+            with pytest.raises(ClientError):
+                await session.fetch('http://localhost/error')
+            assert downloader.fetched.count('http://localhost/error') == 3
+        # the downloader is reused
+        assert len(LocalDownloader.instances) == 1
+        assert session.crawler.stats_collector.get('response_count') == 2
+        with pytest.raises(RuntimeError):
+            await session.fetch('http://localhost/')
+
+    @pytest.mark.asyncio
+    async def test_fetch_many(self):
+        async with Session(downloader=LocalDownloader, max_retry_times=0) as session:
+            results = await session.fetch_many([None, 'http://localhost/error', 'http://localhost/slow',
+                                                HttpRequest('http://localhost/')])
+            assert results[0] is None
+            assert isinstance(results[1], ClientError)
+            assert isinstance(results[2], HttpResponse) and results[2].url == 'http://localhost/slow'
+            assert isinstance(results[3], HttpResponse) and results[3].url == 'http://localhost/'
+
+    @pytest.mark.asyncio
+    async def test_as_completed(self):
+        def requests():
+            yield 'http://localhost/slow'
+            for i in range(5):
+                yield 'http://localhost/{}'.format(i)
+
+        async with Session(downloader=LocalDownloader) as session:
+            indexes = []
+            async for i, res in session.as_completed(requests(), max_in_flight=2):
+                assert res.url.endswith('/slow') if i == 0 else res.url == 'http://localhost/{}'.format(i - 1)
+                indexes.append(i)
+            assert sorted(indexes) == list(range(6))
+            # the slow request completes after the fast ones
+            assert indexes[0] != 0 and indexes[-1] == 0
+            assert session.crawler.downloader.max_in_flight == 2
+            with pytest.raises(ValueError):
+                session.as_completed([], max_in_flight=0)
+
+    @pytest.mark.asyncio
+    async def test_cancel_as_completed(self):
+        async with Session(downloader=LocalDownloader) as session:
+            it = session.as_completed(['http://localhost/slow'] * 3 + ['http://localhost/'], max_in_flight=4)
+            i, res = await it.__anext__()
+            assert i == 3
+            it.cancel()
+            with pytest.raises(StopAsyncIteration):
+                await it.__anext__()
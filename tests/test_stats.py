@@ -1,6 +1,86 @@
 # coding=utf-8
 
-from xpaw.stats import StatsCollector, DummyStatsCollector
+import time
+
+import pytest
+
+from xpaw.stats import StatsCollector, DummyStatsCollector, RateCounter, Histogram
+
+
+class TestRateCounter:
+    def test_value_error(self):
+        with pytest.raises(ValueError):
+            RateCounter(resolution=0)
+        with pytest.raises(ValueError):
+            RateCounter(window=1, resolution=2)
+
+    def test_rate(self):
+        c = RateCounter(window=10)
+        # align the time with the buckets
+        t = int(time.monotonic()) + 100
+        for i in range(10):
+            c.add(2, now=t + i)
+        assert c.total == 20
+        # the values in the last 9 seconds and the current empty bucket
+        assert c.rate(now=t + 10) == pytest.approx(2)
+        assert c.rate(5, now=t + 10) == pytest.approx(2)
+        # the buckets out of the window are dropped
+        c.add(30, now=t + 15)
+        assert c.rate(now=t + 15.5) == pytest.approx((2 * 4 + 30) / 9.5)
+        assert c.rate(1, now=t + 15.5) == pytest.approx(30 / 0.5)
+        assert c.rate(now=t + 100) == 0
+        assert c.total == 50
+
+    def test_young_counter(self):
+        c = RateCounter(window=60)
+        now = time.monotonic()
+        c.add(10, now=now)
+        # the rate is computed in the lifetime of the counter
+        assert c.rate(now=now + 0.5) >= 10
+
+
+class TestHistogram:
+    def test_value_error(self):
+        with pytest.raises(ValueError):
+            Histogram(precision=0)
+        with pytest.raises(ValueError):
+            Histogram(precision=1)
+
+    def test_percentile(self):
+        h = Histogram(precision=0.01)
+        assert h.percentile(50) is None
+        assert h.mean is None
+        for i in range(1, 10001):
+            h.record(i / 1000)
+        assert h.count == 10000
+        assert h.min == 0.001 and h.max == 10
+        assert h.mean == pytest.approx(5.0005)
+        for p in (50, 95, 99):
+            assert h.percentile(p) == pytest.approx(p / 10, rel=0.011)
+        assert h.percentile(0) == pytest.approx(0.001, rel=0.011)
+        assert h.percentile(100) == pytest.approx(10, rel=0.011)
+        # the number of buckets only depends on the range of values
+        assert len(h._buckets) < 400
+
+    def test_zero_values(self):
+        h = Histogram()
+        h.record(0)
+        h.record(0)
+        h.record(1)
+        assert h.percentile(50) == 0
+        assert h.percentile(100) == 1
+
+    def test_merge(self):
+        h1, h2, h = Histogram(), Histogram(), Histogram()
+        for i in range(1, 1001):
+            (h1 if i % 2 else h2).record(i)
+            h.record(i)
+        h1.merge(h2)
+        assert h1.count == 1000
+        assert h1.min == 1 and h1.max == 1000
+        assert h1.summary() == h.summary()
+        with pytest.raises(ValueError):
+            h1.merge(Histogram(precision=0.05))
 
 
 class TestStatsCollector:
@@ -50,6 +130,38 @@ class TestStatsCollector:
         stats.inc('key4', 2, start=3)
         assert stats.get('key4') == 5
 
+    def test_mark_rate(self):
+        stats = StatsCollector()
+        assert stats.get_rate('key') == 0
+        for i in range(10):
+            stats.mark('key')
+        stats.mark('key', 5)
+        assert stats.rates['key'].total == 15
+        assert stats.get_rate('key') > 0
+        stats.clear()
+        assert stats.get_rate('key') == 0
+
+    def test_observe(self):
+        stats = StatsCollector()
+        assert stats.get_histogram('key') is None
+        for i in range(100):
+            stats.observe('key', i)
+        assert stats.get_histogram('key').count == 100
+        assert 'key' in stats.histograms
+        stats.clear()
+        assert stats.get_histogram('key') is None
+
+    def test_host_key(self):
+        stats = StatsCollector(max_hosts=2)
+        assert stats.host_key('key', 'http://a.com/1') == 'key/a.com'
+        assert stats.host_key('key', '/path') is None
+        assert stats.host_key('key', 'http://b.com/') == 'key/b.com'
+        assert stats.host_key('key', 'http://c.com/') is None
+        assert stats.host_key('other', 'http://a.com/2') == 'other/a.com'
+        stats.clear()
+        assert stats.host_key('key', 'http://c.com/') == 'key/c.com'
+        assert StatsCollector(max_hosts=0).host_key('key', 'http://a.com/') is None
+
     def test_clear_stats(self):
         stats = StatsCollector()
         stats.set('key1', 1)
@@ -90,6 +202,10 @@ class TestDummyStatsCollector:
         stats = DummyStatsCollector()
         stats.inc('key')
         assert stats.get('key') is None
+        stats.mark('key')
+        assert stats.get_rate('key') == 0
+        stats.observe('key', 1)
+        assert stats.get_histogram('key') is None
 
     def test_set_stats(self):
         stats = DummyStatsCollector()
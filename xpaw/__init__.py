@@ -5,7 +5,8 @@ from .downloader import Downloader
 from .spider import Spider
 from .selector import Selector
 from .item import Item, Field
-from .run import run_spider, run_spider_project, make_requests
+from .run import run_spider, run_spider_project, make_requests, iter_requests
+from .session import Session
 from .decorator import every
 
 __all__ = ['HttpRequest', 'HttpResponse', 'HttpHeaders',
@@ -13,7 +14,8 @@ __all__ = ['HttpRequest', 'HttpResponse', 'HttpHeaders',
            'Spider',
            'Selector',
            'Item', 'Field',
-           'run_spider', 'run_spider_project', 'make_requests',
+           'run_spider', 'run_spider_project', 'make_requests', 'iter_requests',
+           'Session',
            'every']
 
 __version__ = '0.12.0'
@@ -122,6 +122,10 @@ DEFAULT_CONFIG = {
     'stats_collector': 'xpaw.stats.StatsCollector',
     'queue': 'xpaw.queue.PriorityQueue',
     'dupe_filter': 'xpaw.dupefilter.HashDupeFilter',
+    'start_requests_low_water_mark': 1000,
+    'core_stats_enabled': True,
+    'stats_report_interval': 60,
+    'stats_max_hosts': 100,
     'default_extensions': [
         'xpaw.extensions.DefaultHeadersMiddleware',
         'xpaw.extensions.UserAgentMiddleware',
@@ -129,5 +133,8 @@ DEFAULT_CONFIG = {
         'xpaw.extensions.ProxyMiddleware',
         'xpaw.extensions.SpeedLimitMiddleware',
         'xpaw.extensions.DepthMiddleware',
+        'xpaw.extensions.CoreStats',
+        'xpaw.extensions.StatsReporter',
+        'xpaw.extensions.MetricsServer',
     ]
 }
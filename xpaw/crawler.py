@@ -5,6 +5,8 @@ import logging
 from asyncio import CancelledError
 import time
 import inspect
+from functools import partial
+from collections import deque
 
 from .http import HttpRequest, HttpResponse
 from .errors import IgnoreRequest, IgnoreItem, StopCrawler, ClientError, HttpError
@@ -13,7 +15,7 @@ from .eventbus import EventBus
 from . import events
 from .extension import ExtensionManager
 from .item import BaseItem
-from .utils import load_object, iterable_to_list, isiterable
+from .utils import load_object, isiterable
 
 log = logging.getLogger(__name__)
 
@@ -22,6 +24,8 @@ class Crawler:
     def __init__(self, config):
         self.config = config
         self.event_bus = EventBus()
+        # set by the runner of the crawler
+        self.runner = None
         self.stats_collector = self._instance_from_crawler(self.config.get('stats_collector'))
         self.queue = self._instance_from_crawler(self.config.get('queue'))
         self.dupe_filter = self._instance_from_crawler(self.config.get('dupe_filter'))
@@ -33,26 +37,25 @@ class Crawler:
         log.info('Extensions: %s', self._log_objects(self.extension.components))
 
     async def start_requests(self):
+        """
+        Return the start requests passed through the extensions, which are generated lazily.
+        """
         try:
-            res = await self._start_requests()
+            res = self.spider.start_requests()
+            if inspect.iscoroutine(res):
+                res = await res
+            assert res is None or isiterable(res), \
+                "Start requests must be None or an iterable object, got {}".format(type(res).__name__)
+            if res is None:
+                return ()
+            if hasattr(res, '__aiter__'):
+                return _AsyncStartRequests(res, self.extension)
+            return await self.extension.handle_start_requests(res)
         except CancelledError:
             raise
         except Exception:
             log.warning("Failed to get start requests", exc_info=True)
-        else:
-            return [r for r in res if isinstance(r, HttpRequest)]
-
-    async def _start_requests(self):
-        res = self.spider.start_requests()
-        if inspect.iscoroutine(res):
-            res = await res
-        assert res is None or isiterable(res), \
-            "Start requests must be None or an iterable object, got {}".format(type(res).__name__)
-        result = await iterable_to_list(res)
-        if result:
-            res = await self.extension.handle_start_requests(result)
-            result = await iterable_to_list(res)
-        return result
+            return ()
 
     async def schedule(self, request):
         try:
@@ -60,13 +63,22 @@ class Crawler:
             if inspect.iscoroutine(res):
                 res = await res
             if not res:
-                await self.event_bus.send(events.request_scheduled, request=request)
+                if self.event_bus.has_subscribers(events.request_scheduled):
+                    await self.event_bus.send(events.request_scheduled, request=request)
+                request._scheduled_time = time.time()
                 await self.queue.push(request)
+            elif self.event_bus.has_subscribers(events.request_duplicated):
+                await self.event_bus.send(events.request_duplicated, request=request)
         except Exception:
             log.warning('Failed to schedule %s', request, exc_info=True)
 
     async def next_request(self):
         req = await self.queue.pop()
+        # not set if the request is restored from a persistent queue
+        t = getattr(req, '_scheduled_time', None)
+        if t is not None:
+            req._scheduled_time = None
+            self._observe_latency('queue_wait_time', req, time.time() - t)
         return req
 
     async def fetch(self, req):
@@ -86,13 +98,29 @@ class Crawler:
         else:
             await self._handle_response(resp)
 
+    async def download(self, request):
+        """
+        Download the request through the extensions without calling the spider,
+        the requests returned by the extensions, e.g. the retries, are downloaded in place.
+        """
+        res = await self._fetch(request)
+        while isinstance(res, HttpRequest):
+            res = await self._fetch(res)
+        if self.event_bus.has_subscribers(events.response_received):
+            await self.event_bus.send(events.response_received, response=res)
+        return res
+
     async def _fetch(self, req):
         try:
             res = await self.extension.handle_request(req)
             if isinstance(res, HttpRequest):
                 return res
             if res is None:
-                res = await self.downloader.fetch(req)
+                start = time.perf_counter()
+                try:
+                    res = await self.downloader.fetch(req)
+                finally:
+                    self._observe_latency('download_time', req, time.perf_counter() - start)
         except CancelledError:
             raise
         except Exception as e:
@@ -111,9 +139,12 @@ class Crawler:
         if isinstance(resp, HttpRequest):
             await self.schedule(resp)
         elif isinstance(resp, HttpResponse):
-            await self.event_bus.send(events.response_received, response=resp)
+            if self.event_bus.has_subscribers(events.response_received):
+                await self.event_bus.send(events.response_received, response=resp)
+            start = time.perf_counter()
             try:
                 result = await self._parse(resp)
+                await self._handle_spider_output(resp, result)
             except CancelledError:
                 raise
             except Exception as e:
@@ -124,9 +155,8 @@ class Crawler:
                     await self.event_bus.send(events.request_ignored, request=resp.request, error=e)
                 else:
                     log.warning("Failed to parse %s", resp, exc_info=True)
-            else:
-                for r in result:
-                    await self._handle_parsing_result(r)
+            finally:
+                self._observe_latency('parse_time', resp.request, time.perf_counter() - start)
 
     async def _parse(self, response):
         request = response.request
@@ -141,25 +171,51 @@ class Crawler:
             res = await self.spider.request_success(response)
             assert res is None or isiterable(res), \
                 "Parsing result must be None or an iterable object, got {}".format(type(res).__name__)
-            result = await iterable_to_list(res)
         except CancelledError:
             raise
         except Exception as e:
-            res = await self.extension.handle_spider_error(response, e)
-            if isinstance(res, Exception):
-                raise res
-            result = await iterable_to_list(res)
-        if result:
+            res = await self._handle_spider_error(response, e)
+        return res
+
+    async def _handle_spider_error(self, response, error):
+        res = await self.extension.handle_spider_error(response, error)
+        if isinstance(res, Exception):
+            raise res
+        return res
+
+    async def _handle_spider_output(self, response, result, catch_error=True):
+        """
+        Pass the output of spider through the extensions and handle each result as soon as it is generated.
+        """
+        if result is None:
+            return
+        if catch_error:
+            result = _AsyncSpiderOutput(result) if hasattr(result, '__aiter__') else _SpiderOutput(result)
+        if hasattr(result, '__aiter__'):
+            async for r in result:
+                res = await self.extension.handle_spider_output(response, (r,))
+                await self._handle_parsing_results(res)
+        else:
             res = await self.extension.handle_spider_output(response, result)
-            result = await iterable_to_list(res)
-        return result
+            await self._handle_parsing_results(res)
+        if catch_error and result.error is not None:
+            res = await self._handle_spider_error(response, result.error)
+            await self._handle_spider_output(response, res, catch_error=False)
+
+    async def _handle_parsing_results(self, results):
+        if hasattr(results, '__aiter__'):
+            async for r in results:
+                await self._handle_parsing_result(r)
+        else:
+            for r in results:
+                await self._handle_parsing_result(r)
 
     async def _handle_parsing_result(self, result):
         if isinstance(result, HttpRequest):
             await self.schedule(result)
         elif isinstance(result, (BaseItem, dict)):
             try:
-                await self.extension.handle_item(result)
+                await self._handle_item(result)
             except CancelledError:
                 raise
             except Exception as e:
@@ -168,7 +224,26 @@ class Crawler:
                 else:
                     log.warning("Failed to handle %s", result, exc_info=True)
             else:
-                await self.event_bus.send(events.item_scraped, item=result)
+                if self.event_bus.has_subscribers(events.item_scraped):
+                    await self.event_bus.send(events.item_scraped, item=result)
+
+    async def _handle_item(self, item):
+        start = time.perf_counter()
+        try:
+            await self.extension.handle_item(item)
+        finally:
+            self.stats_collector.observe('item_time', time.perf_counter() - start)
+
+    def _observe_latency(self, key, request, value):
+        """
+        Observe the latency globally and per host.
+        """
+        stats = self.stats_collector
+        stats.observe(key, value)
+        if request is not None:
+            host_key = stats.host_key(key, request.url)
+            if host_key:
+                stats.observe(host_key, value)
 
     def _instance_from_crawler(self, cls_path):
         obj_cls = load_object(cls_path)
@@ -188,18 +263,127 @@ class Crawler:
         return ''
 
 
+class _SpiderOutput:
+    """
+    Iterate over the output of spider and keep the error raised during the iteration.
+    """
+
+    def __init__(self, result):
+        self._iter = iter(result)
+        self.error = None
+
+    def __iter__(self):
+        return self
+
+    def __next__(self):
+        try:
+            return next(self._iter)
+        except (StopIteration, CancelledError):
+            raise
+        except Exception as e:
+            self.error = e
+            raise StopIteration
+
+
+class _AsyncStartRequests:
+    """
+    Pass the asynchronously generated start requests through the extensions one by one.
+    """
+
+    def __init__(self, result, extension):
+        self._iter = result.__aiter__()
+        self._extension = extension
+        self._buffer = deque()
+
+    def __aiter__(self):
+        return self
+
+    async def __anext__(self):
+        while not self._buffer:
+            r = await self._iter.__anext__()
+            res = await self._extension.handle_start_requests((r,))
+            if hasattr(res, '__aiter__'):
+                async for i in res:
+                    self._buffer.append(i)
+            else:
+                self._buffer.extend(res)
+        return self._buffer.popleft()
+
+
+class _AsyncSpiderOutput:
+    """
+    Asynchronously iterate over the output of spider and keep the error raised during the iteration.
+    """
+
+    def __init__(self, result):
+        self._iter = result.__aiter__()
+        self.error = None
+
+    def __aiter__(self):
+        return self
+
+    async def __anext__(self):
+        try:
+            return await self._iter.__anext__()
+        except (StopAsyncIteration, CancelledError):
+            raise
+        except Exception as e:
+            self.error = e
+            raise StopAsyncIteration
+
+
 class CrawlerRunner:
     def __init__(self, crawler):
         self.crawler = crawler
+        crawler.runner = self
 
         self._workers = None
-        self._workers_done = None
+        self._max_workers = 0
+        self._next_worker_id = 0
+        self._idle_workers = 0
         self._req_in_worker = None
+        self._in_flight = 0
+        self._worker_time = 0
+        self._busy_time = 0
+        self._start_time = None
         self._start_future = None
+        self._low_water_mark = None
+        self._below_low_water_event = None
         self._supervisor_future = None
+        self._all_done_event = None
         self._is_running = False
         self._run_lock = None
 
+    @property
+    def in_flight(self):
+        """
+        The number of requests being handled by the workers.
+        """
+        return self._in_flight
+
+    @property
+    def workers(self):
+        return len(self._workers) if self._workers else 0
+
+    @property
+    def max_workers(self):
+        """
+        The maximum number of workers, i.e. the maximum number of simultaneous clients of the downloader.
+        """
+        return self._max_workers
+
+    @property
+    def worker_utilization(self):
+        """
+        The busy time of the workers divided by the capacity, i.e. ``max_workers`` multiplied by the elapsed time.
+        """
+        if self._start_time is None or self._max_workers <= 0:
+            return 0
+        elapsed = time.time() - self._start_time
+        if elapsed <= 0:
+            return 0
+        return self._busy_time / (self._max_workers * elapsed)
+
     async def run(self):
         if self._is_running:
             return
@@ -211,16 +395,22 @@ class CrawlerRunner:
 
     async def _init(self):
         await self.crawler.event_bus.send(events.crawler_start)
+        self._all_done_event = asyncio.Event()
         self._supervisor_future = asyncio.ensure_future(self._supervisor())
+        self._max_workers = self.crawler.downloader.max_clients
+        log.info("The maximum number of simultaneous clients: %s", self._max_workers)
+        self._workers = {}
+        self._req_in_worker = {}
+        self._in_flight = 0
+        self._worker_time = 0
+        self._busy_time = 0
+        self._start_time = time.time()
+        self.crawler.event_bus.subscribe(self._on_request_scheduled, events.request_scheduled)
+        self._spawn_worker()
+        self._low_water_mark = self.crawler.config.getint('start_requests_low_water_mark')
+        self._below_low_water_event = asyncio.Event()
         self._start_future = asyncio.ensure_future(self._generate_start_requests())
-        downloader_clients = self.crawler.downloader.max_clients
-        log.info("The maximum number of simultaneous clients: %s", downloader_clients)
-        self._workers = []
-        for i in range(downloader_clients):
-            f = asyncio.ensure_future(self._download(i))
-            self._workers.append(f)
-        self._workers_done = set()
-        self._req_in_worker = [None] * downloader_clients
+        self._start_future.add_done_callback(self._on_start_requests_done)
         log.info('Crawler is initialized')
 
     def stop(self):
@@ -233,11 +423,10 @@ class CrawlerRunner:
         log.info("Shutdown now")
         cancelled_futures = []
         if self._workers:
-            for f in self._workers:
+            for f in self._workers.values():
                 f.cancel()
                 cancelled_futures.append(f)
-            self._workers = None
-            self._workers_done = None
+        self._workers = None
         if self._start_future:
             self._start_future.cancel()
             cancelled_futures.append(self._start_future)
@@ -246,47 +435,99 @@ class CrawlerRunner:
             self._supervisor_future.cancel()
             cancelled_futures.append(self._supervisor_future)
             self._supervisor_future = None
-        # put back the unfinished requests
+        # put back the unfinished requests, which have passed the dupe filter
         if self._req_in_worker:
-            for r in self._req_in_worker:
-                if r:
-                    await self.crawler.schedule(r)
+            for r in self._req_in_worker.values():
+                await self.crawler.queue.push(r)
             self._req_in_worker = None
+        if cancelled_futures:
+            # wait cancelled futures
+            await asyncio.wait(cancelled_futures)
+        # handle the queued events before shutdown
+        await self.crawler.event_bus.flush()
+        self._collect_worker_stats()
+        self._collect_event_stats()
+        self._collect_latency_stats()
         await self.crawler.event_bus.send(events.crawler_shutdown)
-        # wait cancelled futures
-        await asyncio.wait(cancelled_futures)
+        await self.crawler.event_bus.flush()
+        self.crawler.event_bus.close()
         log.info('Crawler is stopped')
         if self._run_lock:
             self._run_lock.set_result(True)
 
     async def _supervisor(self):
-        while True:
-            await asyncio.sleep(5)
-            for i in range(len(self._workers)):
-                f = self._workers[i]
-                if f.done():
-                    if i not in self._workers_done:
-                        self._workers_done.add(i)
-                        reason = "This future is cancelled" if f.cancelled() else str(f.exception())
-                        log.error("Worker[%s] is shutdown: %s", i, reason)
-                        self._req_in_worker[i] = None
-            if self._all_done():
-                break
+        await self._all_done_event.wait()
         self.stop()
 
+    def _spawn_worker(self):
+        worker_id = self._next_worker_id
+        self._next_worker_id += 1
+        # the worker is regarded as idle until it gets a request
+        self._idle_workers += 1
+        f = asyncio.ensure_future(self._download(worker_id))
+        f.add_done_callback(partial(self._on_worker_done, worker_id))
+        self._workers[worker_id] = f
+        stats = self.crawler.stats_collector
+        stats.inc('worker_spawned')
+        stats.set_max('worker_peak', len(self._workers))
+
+    def _maybe_spawn_worker(self, ready_requests):
+        if ready_requests > self._idle_workers and len(self._workers) < self._max_workers:
+            self._spawn_worker()
+
+    def _on_request_scheduled(self, request):
+        if self._is_running and self._workers is not None:
+            # the request will be pushed into the queue right after this event
+            self._maybe_spawn_worker(len(self.crawler.queue) + 1)
+
+    def _on_worker_done(self, worker_id, future):
+        if self._workers is None:
+            # the worker is cancelled on shutdown
+            return
+        if self._workers.pop(worker_id, None) is None:
+            # the worker is retired
+            return
+        reason = "This future is cancelled" if future.cancelled() else str(future.exception())
+        log.error("Worker[%s] is shutdown: %s", worker_id, reason)
+        if self._req_in_worker.pop(worker_id, None) is not None:
+            self._in_flight -= 1
+        self._check_done()
+
+    def _on_start_requests_done(self, future):
+        if self._workers is not None:
+            self._check_done()
+
+    def _check_done(self):
+        if self._workers is not None and self._all_done():
+            self._all_done_event.set()
+
     def _all_done(self):
-        if self._start_future.done() and len(self.crawler.queue) <= 0:
-            no_active = True
-            for i in range(len(self._workers)):
-                if self._req_in_worker[i]:
-                    no_active = False
-                    break
-            return no_active
-        elif len(self._workers_done) == len(self._workers):
+        if self._start_future is not None and self._start_future.done() \
+                and self._in_flight <= 0 and len(self.crawler.queue) <= 0:
+            return True
+        if not self._workers:
             log.error('No alive worker')
             return True
         return False
 
+    def _collect_worker_stats(self):
+        stats = self.crawler.stats_collector
+        stats.set('worker_time', self._worker_time)
+        stats.set('worker_busy_time', self._busy_time)
+        stats.set('worker_utilization', self.worker_utilization)
+
+    def _collect_event_stats(self):
+        stats = self.crawler.stats_collector
+        for name, d in self.crawler.event_bus.subscriber_stats().items():
+            for k, v in d.items():
+                stats.set('event_subscriber/{}/{}'.format(name, k), v)
+
+    def _collect_latency_stats(self):
+        stats = self.crawler.stats_collector
+        for name, h in list(stats.histograms.items()):
+            for k, v in h.summary().items():
+                stats.set('{}/{}'.format(name, k), v)
+
     async def _generate_start_requests(self):
         if hasattr(self.crawler.spider.start_requests, "cron_job"):
             tick = self.crawler.spider.start_requests.cron_tick
@@ -294,26 +535,69 @@ class CrawlerRunner:
             tick = 0
         while True:
             t = time.time()
-            reqs = await self.crawler.start_requests()
-            for r in reqs:
-                await self.crawler.schedule(r)
+            await self._schedule_start_requests()
             if tick <= 0:
                 break
             t = time.time() - t
             if t < tick:
                 await asyncio.sleep(tick - t)
 
-    async def _download(self, coro_id):
-        while True:
-            req = await self.crawler.next_request()
-            log.debug("%s -> worker[%s]", req, coro_id)
-            self._req_in_worker[coro_id] = req
-            try:
-                await self.crawler.fetch(req)
-            except StopCrawler:
-                self.stop()
-                continue
-            self._req_in_worker[coro_id] = None
-            # check if it's all done
-            if self._all_done():
-                self.stop()
+    async def _schedule_start_requests(self):
+        reqs = await self.crawler.start_requests()
+        if hasattr(reqs, '__aiter__'):
+            reqs = _AsyncSpiderOutput(reqs)
+            async for r in reqs:
+                await self._schedule_start_request(r)
+        else:
+            reqs = _SpiderOutput(reqs)
+            for r in reqs:
+                await self._schedule_start_request(r)
+        if reqs.error is not None:
+            log.warning("Failed to get start requests", exc_info=reqs.error)
+
+    async def _schedule_start_request(self, request):
+        if not isinstance(request, HttpRequest):
+            return
+        if self._low_water_mark is not None and self._low_water_mark > 0:
+            # pull the next start request only when the queue drops below the low-water mark
+            while len(self.crawler.queue) >= self._low_water_mark:
+                self._below_low_water_event.clear()
+                await self._below_low_water_event.wait()
+        await self.crawler.schedule(request)
+
+    async def _download(self, worker_id):
+        start_time = time.time()
+        try:
+            while True:
+                try:
+                    req = await self.crawler.next_request()
+                finally:
+                    self._idle_workers -= 1
+                log.debug("%s -> worker[%s]", req, worker_id)
+                queue_size = len(self.crawler.queue)
+                if self._low_water_mark is not None and queue_size < self._low_water_mark:
+                    self._below_low_water_event.set()
+                self._maybe_spawn_worker(queue_size)
+                self._req_in_worker[worker_id] = req
+                self._in_flight += 1
+                t = time.time()
+                try:
+                    await self.crawler.fetch(req)
+                except StopCrawler:
+                    self.stop()
+                    self._idle_workers += 1
+                    continue
+                finally:
+                    self._busy_time += time.time() - t
+                del self._req_in_worker[worker_id]
+                self._in_flight -= 1
+                # check if it's all done
+                self._check_done()
+                if self._idle_workers > 0 and len(self.crawler.queue) <= 0:
+                    # retire since there is no ready request and another worker is waiting
+                    del self._workers[worker_id]
+                    self.crawler.stats_collector.inc('worker_retired')
+                    break
+                self._idle_workers += 1
+        finally:
+            self._worker_time += time.time() - start_time
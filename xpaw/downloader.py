@@ -13,7 +13,7 @@ import pycurl
 from .http import HttpResponse
 from .errors import ClientError, HttpError
 from . import events
-from .renderer import ChromeRenderer
+from .renderer import ChromeRenderer, RenderCache
 from .utils import with_not_none_params
 
 log = logging.getLogger(__name__)
@@ -31,7 +31,12 @@ class Downloader:
     @classmethod
     def from_crawler(cls, crawler):
         config = crawler.config
-        renderer = ChromeRenderer(options=config.get('chrome_renderer_options'))
+        cache = None
+        if config.get('render_cache_dir'):
+            cache = RenderCache(config.get('render_cache_dir'),
+                                **with_not_none_params(ttl=config.getfloat('render_cache_ttl'),
+                                                       max_size=config.getint('render_cache_size')))
+        renderer = ChromeRenderer(options=config.get('chrome_renderer_options'), cache=cache)
         downloader = cls(**with_not_none_params(max_clients=config.getint('downloader_clients'),
                                                 renderer=renderer,
                                                 renderer_cores=config.getint('renderer_cores')))
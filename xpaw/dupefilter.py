@@ -2,7 +2,8 @@
 
 import logging
 
-from .utils import request_fingerprint
+from .utils import request_fingerprint, open_sqlite, with_not_none_params
+from . import events
 
 log = logging.getLogger(__name__)
 
@@ -23,3 +24,68 @@ class HashDupeFilter:
 
     def clear(self):
         self._hash.clear()
+
+
+class SqliteDupeFilter:
+    """
+    Keep the fingerprints of requests in a SQLite database.
+
+    The new fingerprints are written in a single transaction every ``batch_size`` requests,
+    and the remaining ones are written when the dupe filter is closed.
+    """
+
+    def __init__(self, path, batch_size=1000):
+        if batch_size <= 0:
+            raise ValueError('batch_size must be greater than 0')
+        self._path = path
+        self._batch_size = batch_size
+        self._conn = open_sqlite(path)
+        self._conn.execute('CREATE TABLE IF NOT EXISTS fingerprints (fingerprint TEXT PRIMARY KEY) WITHOUT ROWID')
+        self._conn.commit()
+        self._buffer = set()
+
+    def __repr__(self):
+        cls_name = self.__class__.__name__
+        return '{}(path={}, batch_size={})'.format(cls_name, repr(self._path), repr(self._batch_size))
+
+    @classmethod
+    def from_crawler(cls, crawler):
+        config = crawler.config
+        path = config.get('sqlite_path')
+        if not path:
+            raise ValueError("'sqlite_path' is required by {}".format(cls.__name__))
+        obj = cls(path, **with_not_none_params(batch_size=config.getint('sqlite_batch_size')))
+        crawler.event_bus.subscribe(obj.close, events.crawler_shutdown)
+        return obj
+
+    def is_duplicated(self, request):
+        if request.dont_filter:
+            return False
+        h = request_fingerprint(request)
+        if h in self._buffer or self._conn.execute('SELECT 1 FROM fingerprints WHERE fingerprint = ?',
+                                                   (h,)).fetchone() is not None:
+            log.debug("%s is duplicated", request)
+            return True
+        self._buffer.add(h)
+        if len(self._buffer) >= self._batch_size:
+            self._write()
+        return False
+
+    def clear(self):
+        self._buffer.clear()
+        self._conn.execute('DELETE FROM fingerprints')
+        self._conn.commit()
+
+    def close(self):
+        if self._conn is None:
+            return
+        self._write()
+        self._conn.close()
+        self._conn = None
+
+    def _write(self):
+        if not self._buffer:
+            return
+        self._conn.executemany('INSERT OR IGNORE INTO fingerprints VALUES (?)', [(h,) for h in self._buffer])
+        self._conn.commit()
+        self._buffer.clear()
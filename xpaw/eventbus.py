@@ -1,18 +1,37 @@
 # coding=utf-8
 
+import time
 import weakref
 import inspect
 import logging
+import asyncio
 from asyncio import CancelledError
 
 log = logging.getLogger(__name__)
 
+INLINE = 'inline'
+CONCURRENT = 'concurrent'
+QUEUED = 'queued'
+
 
 class EventBus:
+    """
+    The subscribers of an event are dispatched according to their modes:
+
+    - ``inline``: awaited one by one in the order of subscription.
+    - ``concurrent``: awaited together after the inline subscribers.
+    - ``queued``: the event is put into a bounded buffer and handled by a background task,
+      thus the sender never waits for the subscriber. The event is dropped if the buffer is full.
+    """
+
     def __init__(self):
         self._refs = {}
+        # event -> resolved subscriptions
+        self._cache = {}
 
-    def subscribe(self, receiver, event):
+    def subscribe(self, receiver, event, mode=INLINE, buffer_size=1000):
+        if mode not in (INLINE, CONCURRENT, QUEUED):
+            raise ValueError("Unknown dispatch mode: {}".format(mode))
         if event not in self._refs:
             self._refs[event] = {}
         if not hasattr(receiver, '__func__') or not hasattr(receiver, '__self__'):
@@ -22,23 +41,164 @@ class EventBus:
             f = self._refs[event][i]()
             if f is not None:
                 return
-        self._refs[event][i] = weakref.WeakMethod(receiver)
+        self._refs[event][i] = Subscription(receiver, mode, buffer_size,
+                                            callback=lambda ref: self._invalidate(event))
+        self._invalidate(event)
 
     def unsubscribe(self, receiver, event):
         if event in self._refs:
             i = self._calc_id(receiver)
             if i in self._refs[event]:
-                del self._refs[event][i]
+                self._refs[event].pop(i).cancel()
+                self._invalidate(event)
+
+    def has_subscribers(self, event):
+        subs = self._cache.get(event)
+        if subs is None:
+            subs = self._resolve(event)
+        return len(subs) > 0
 
     async def send(self, event, **kwargs):
-        if event not in self._refs:
+        subs = self._cache.get(event)
+        if subs is None:
+            subs = self._resolve(event)
+        if not subs:
             return
-        del_list = []
-        for i in self._refs[event]:
-            f = self._refs[event][i]()
+        concurrent = None
+        for s in subs:
+            f = s()
             if f is None:
-                del_list.append(i)
-            else:
+                continue
+            if s.mode == QUEUED:
+                s.put(kwargs)
+                continue
+            start = time.perf_counter()
+            try:
+                res = f(**kwargs)
+                if inspect.iscoroutine(res):
+                    if s.mode == CONCURRENT:
+                        if concurrent is None:
+                            concurrent = []
+                        concurrent.append(s.wait(res, start))
+                        continue
+                    await res
+            except CancelledError:
+                raise
+            except Exception:
+                log.warning("Failed to send the event", exc_info=True)
+            s.record(time.perf_counter() - start)
+        if concurrent:
+            await asyncio.gather(*concurrent)
+
+    def _invalidate(self, event):
+        self._cache.pop(event, None)
+
+    def _resolve(self, event):
+        refs = self._refs.get(event)
+        if refs is None:
+            subs = ()
+        else:
+            for i in [i for i, s in refs.items() if s() is None]:
+                refs.pop(i).cancel()
+            subs = tuple(refs.values())
+        self._cache[event] = subs
+        return subs
+
+    async def flush(self):
+        """
+        Wait until all the queued events are handled.
+        """
+        for refs in list(self._refs.values()):
+            for s in list(refs.values()):
+                await s.join()
+
+    def close(self):
+        """
+        Cancel the background tasks of queued subscribers.
+        """
+        for refs in self._refs.values():
+            for s in refs.values():
+                s.cancel()
+
+    def subscriber_stats(self):
+        """
+        Return the call count, cumulative time, maximum time and dropped events of each living subscriber.
+        """
+        res = {}
+        for refs in self._refs.values():
+            for s in refs.values():
+                if s() is None:
+                    continue
+                d = res.setdefault(s.name, {'count': 0, 'total_time': 0, 'max_time': 0, 'dropped': 0})
+                d['count'] += s.count
+                d['total_time'] += s.total_time
+                d['max_time'] = max(d['max_time'], s.max_time)
+                d['dropped'] += s.dropped
+        return res
+
+    def _calc_id(self, receiver):
+        return hash((id(receiver.__func__), id(receiver.__self__)))
+
+
+class Subscription:
+    def __init__(self, receiver, mode, buffer_size, callback=None):
+        self.ref = weakref.WeakMethod(receiver, callback)
+        self.name = receiver.__qualname__
+        self.mode = mode
+        self.buffer_size = buffer_size
+        self.count = 0
+        self.total_time = 0
+        self.max_time = 0
+        self.dropped = 0
+        self._queue = None
+        self._task = None
+
+    def __call__(self):
+        return self.ref()
+
+    def record(self, t):
+        self.count += 1
+        self.total_time += t
+        if t > self.max_time:
+            self.max_time = t
+
+    async def wait(self, coro, start):
+        try:
+            await coro
+        except CancelledError:
+            raise
+        except Exception:
+            log.warning("Failed to send the event", exc_info=True)
+        self.record(time.perf_counter() - start)
+
+    def put(self, kwargs):
+        if self._queue is None:
+            self._queue = asyncio.Queue(maxsize=self.buffer_size)
+            self._task = asyncio.ensure_future(self._consume())
+        try:
+            self._queue.put_nowait(kwargs)
+        except asyncio.QueueFull:
+            if self.dropped == 0:
+                log.warning("The event buffer of %s is full, drop the event", self.name)
+            self.dropped += 1
+
+    async def join(self):
+        if self._queue is not None and self._task is not None and not self._task.done():
+            await self._queue.join()
+
+    def cancel(self):
+        if self._task is not None:
+            self._task.cancel()
+            self._task = None
+
+    async def _consume(self):
+        while True:
+            kwargs = await self._queue.get()
+            try:
+                f = self.ref()
+                if f is None:
+                    continue
+                start = time.perf_counter()
                 try:
                     res = f(**kwargs)
                     if inspect.iscoroutine(res):
@@ -47,9 +207,6 @@ class EventBus:
                     raise
                 except Exception:
                     log.warning("Failed to send the event", exc_info=True)
-        for i in del_list:
-            del self._refs[event][i]
-        del del_list
-
-    def _calc_id(self, receiver):
-        return hash((id(receiver.__func__), id(receiver.__self__)))
+                self.record(time.perf_counter() - start)
+            finally:
+                self._queue.task_done()
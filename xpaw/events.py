@@ -6,6 +6,7 @@ crawler_shutdown = object()
 
 request_scheduled = object()
 request_ignored = object()
+request_duplicated = object()
 response_received = object()
 
 item_scraped = object()
@@ -2,17 +2,34 @@
 
 import logging
 import inspect
+import asyncio
+import time
+from collections import deque
 
 from .utils import load_object, isiterable
 from . import events
 from .errors import NotEnabled
-from .http import HttpRequest, HttpResponse, HttpHeaders, _HttpHeaders
+from .http import HttpRequest, HttpResponse
 
 log = logging.getLogger(__name__)
 
 
 class ExtensionManager:
-    def __init__(self, *extensions):
+    """
+    The handlers of extensions are compiled into chains when the manager is created.
+    The handlers defined by ``async def`` are always awaited without checking their results,
+    the results of the other handlers are awaited if they are awaitable.
+    The results of handlers are validated only in debug mode.
+    The latency of handlers is recorded only in profiling mode,
+    except for the spider output and start requests handlers which return lazy iterators.
+    """
+
+    def __init__(self, *extensions, debug=False, profiling=False, stats_collector=None):
+        self._debug = debug
+        self._profiling = profiling
+        self._stats_collector = stats_collector
+        self._profiles = []
+
         self._open_handlers = []
         self._close_handlers = []
 
@@ -30,6 +47,7 @@ class ExtensionManager:
         self.components = []
         for ext in extensions:
             self._add_extension(ext)
+        self._compile()
 
     @classmethod
     def _extension_list_from_config(cls, config):
@@ -50,7 +68,10 @@ class ExtensionManager:
                 log.debug('%s is not enabled', cls_path)
             else:
                 exts.append(ext)
-        obj = cls(*exts)
+        obj = cls(*exts,
+                  debug=bool(crawler.config.getbool('extension_debug')),
+                  profiling=bool(crawler.config.getbool('extension_profiling')),
+                  stats_collector=crawler.stats_collector)
         crawler.event_bus.subscribe(obj.open, events.crawler_start)
         crawler.event_bus.subscribe(obj.close, events.crawler_shutdown)
         return obj
@@ -81,6 +102,36 @@ class ExtensionManager:
         if hasattr(ext, "handle_item"):
             self._item_handlers.append(ext.handle_item)
 
+    def _compile(self):
+        self._request_chain = self._make_chain(self._request_handlers, _validate_request_result)
+        self._response_chain = self._make_chain(self._response_handlers, _validate_response_result)
+        self._error_chain = self._make_chain(self._error_handlers, _validate_error_result)
+        self._spider_input_chain = self._make_chain(self._spider_input_handlers, _validate_spider_input_result)
+        # the results of these handlers are usually lazy iterators, thus the cost is not in the call
+        self._spider_output_chain = self._make_chain(self._spider_output_handlers, _validate_spider_output_result,
+                                                     profiling=False)
+        self._spider_error_chain = self._make_chain(self._spider_error_handlers, _validate_spider_error_result)
+        self._start_requests_chain = self._make_chain(self._start_requests_handlers,
+                                                      _validate_start_requests_result, profiling=False)
+        self._item_chain = self._make_chain(self._item_handlers, None)
+
+    def _make_chain(self, handlers, validate, profiling=True):
+        chain = []
+        for method in handlers:
+            # the results of other handlers are checked on every call, since they may return awaitables sometimes,
+            # the check of None is much cheaper than isawaitable
+            is_async = asyncio.iscoroutinefunction(method)
+            handler = method
+            if self._debug:
+                handler = _validated_handler(method, validate)
+                is_async = True
+            if self._profiling and profiling:
+                profile = HandlerProfile(method)
+                self._profiles.append(profile)
+                handler = _profiled_handler(handler, is_async, profile)
+            chain.append((handler, is_async))
+        return tuple(chain)
+
     @staticmethod
     def _list_from_config(name, config):
         c = config.get(name)
@@ -103,95 +154,191 @@ class ExtensionManager:
     def close(self):
         for method in self._close_handlers:
             method()
+        if self._profiling:
+            self._dump_profiles()
+
+    @property
+    def profiles(self):
+        return list(self._profiles)
+
+    def _dump_profiles(self):
+        profiles = sorted((p for p in self._profiles if p.count > 0), key=lambda p: p.total_time, reverse=True)
+        if self._stats_collector is not None:
+            for p in profiles:
+                prefix = 'extension/{}.{}/'.format(p.extension, p.hook)
+                self._stats_collector.set(prefix + 'count', p.count)
+                self._stats_collector.set(prefix + 'total_time', p.total_time)
+                self._stats_collector.set(prefix + 'p50', p.percentile(50))
+                self._stats_collector.set(prefix + 'p99', p.percentile(99))
+        if profiles:
+            log.info('Extension profiles:\n%s', '\n'.join('\t{}'.format(p) for p in profiles))
 
     async def handle_request(self, request):
-        request.headers = self._make_request_headers(request.headers)
-        for method in self._request_handlers:
-            res = method(request)
-            if inspect.iscoroutine(res):
+        for handler, is_async in self._request_chain:
+            res = handler(request)
+            if is_async or (res is not None and inspect.isawaitable(res)):
                 res = await res
-            assert res is None or isinstance(res, (HttpRequest, HttpResponse)), \
-                "Request handler must return None, HttpRequest or HttpResponse, got {}".format(type(res).__name__)
             if res:
                 return res
 
-    def _make_request_headers(self, headers):
-        if isinstance(headers, (HttpHeaders, _HttpHeaders)):
-            return headers
-        res = HttpHeaders()
-        if isinstance(headers, dict):
-            for k, v in headers.items():
-                if isinstance(v, (tuple, list)):
-                    for i in v:
-                        res.add(k, i)
-                else:
-                    res.add(k, v)
-        elif isinstance(headers, (tuple, list)):
-            for k, v in headers:
-                res.add(k, v)
-        return res
-
     async def handle_response(self, request, response):
-        for method in self._response_handlers:
-            res = method(request, response)
-            if inspect.iscoroutine(res):
+        for handler, is_async in self._response_chain:
+            res = handler(request, response)
+            if is_async or (res is not None and inspect.isawaitable(res)):
                 res = await res
-            assert res is None or isinstance(res, HttpRequest), \
-                "Response handler must return None or HttpRequest, got {}".format(type(res).__name__)
             if res:
                 return res
 
     async def handle_error(self, request, error):
-        for method in self._error_handlers:
-            res = method(request, error)
-            if inspect.iscoroutine(res):
+        for handler, is_async in self._error_chain:
+            res = handler(request, error)
+            if is_async or (res is not None and inspect.isawaitable(res)):
                 res = await res
-            assert res is None or isinstance(res, (HttpRequest, HttpResponse)), \
-                "Exception handler must return None, HttpRequest or HttpResponse, got {}".format(type(res).__name__)
             if res:
                 return res
         return error
 
     async def handle_spider_input(self, response):
-        for method in self._spider_input_handlers:
-            res = method(response)
-            if inspect.iscoroutine(res):
-                res = await res
-            assert res is None, \
-                "Spider input handler must return None, got {}".format(type(res).__name__)
+        for handler, is_async in self._spider_input_chain:
+            res = handler(response)
+            if is_async or (res is not None and inspect.isawaitable(res)):
+                await res
 
     async def handle_spider_output(self, response, result):
-        for method in self._spider_output_handlers:
-            result = method(response, result)
-            if inspect.iscoroutine(result):
+        """
+        The handlers get the whole lazy output of a synchronous callback in a single call,
+        but the output of an asynchronous callback is passed one result per call,
+        thus the handlers should not keep state across the results of a call.
+        """
+        for handler, is_async in self._spider_output_chain:
+            result = handler(response, result)
+            if is_async or (result is not None and inspect.isawaitable(result)):
                 result = await result
-            assert isiterable(result), \
-                "Spider output handler must return an iterable object, got {}".format(type(result).__name__)
         return result
 
     async def handle_spider_error(self, response, error):
-        for method in self._spider_error_handlers:
-            res = method(response, error)
-            if inspect.iscoroutine(res):
+        for handler, is_async in self._spider_error_chain:
+            res = handler(response, error)
+            if is_async or (res is not None and inspect.isawaitable(res)):
                 res = await res
-            assert res is None or isiterable(res), \
-                "Spider exception handler must return None or an iterable object, got {}".format(type(res).__name__)
             if res is not None:
                 return res
         return error
 
     async def handle_start_requests(self, result):
-        for method in self._start_requests_handlers:
-            result = method(result)
-            if inspect.iscoroutine(result):
+        for handler, is_async in self._start_requests_chain:
+            result = handler(result)
+            if is_async or (result is not None and inspect.isawaitable(result)):
                 result = await result
-            assert isiterable(result), \
-                "Start requests handler must return an iterable object, got {}".format(type(result).__name__)
         return result
 
     async def handle_item(self, item):
         log.debug('Item (%s): %s', type(item).__name__, item)
-        for method in self._item_handlers:
-            res = method(item)
-            if inspect.iscoroutine(res):
+        for handler, is_async in self._item_chain:
+            res = handler(item)
+            if is_async or (res is not None and inspect.isawaitable(res)):
                 await res
+
+
+class HandlerProfile:
+    """
+    Call count, cumulative time and the recent samples of a handler.
+    """
+
+    max_samples = 10000
+
+    def __init__(self, method):
+        ext = getattr(method, '__self__', None)
+        self.extension = type(ext).__name__ if ext is not None else method.__qualname__.split('.')[0]
+        self.hook = method.__name__
+        self.count = 0
+        self.total_time = 0
+        self.samples = deque(maxlen=self.max_samples)
+
+    def record(self, t):
+        self.count += 1
+        self.total_time += t
+        self.samples.append(t)
+
+    def percentile(self, p):
+        if not self.samples:
+            return None
+        s = sorted(self.samples)
+        return s[min(len(s) - 1, int(len(s) * p / 100))]
+
+    def __repr__(self):
+        return '{}.{}: count={}, total={:.6f}s, p50={:.6f}s, p99={:.6f}s'.format(
+            self.extension, self.hook, self.count, self.total_time, self.percentile(50), self.percentile(99))
+
+
+def _profiled_handler(method, is_async, profile):
+    if is_async:
+        async def handler(*args):
+            start = time.perf_counter()
+            try:
+                return await method(*args)
+            finally:
+                profile.record(time.perf_counter() - start)
+    else:
+        async def wait(res, start):
+            try:
+                return await res
+            finally:
+                profile.record(time.perf_counter() - start)
+
+        def handler(*args):
+            start = time.perf_counter()
+            res = method(*args)
+            if inspect.isawaitable(res):
+                return wait(res, start)
+            profile.record(time.perf_counter() - start)
+            return res
+
+    return handler
+
+
+def _validated_handler(method, validate):
+    async def handler(*args):
+        res = method(*args)
+        if inspect.isawaitable(res):
+            res = await res
+        if validate is not None:
+            validate(res)
+        return res
+
+    return handler
+
+
+def _validate_request_result(res):
+    assert res is None or isinstance(res, (HttpRequest, HttpResponse)), \
+        "Request handler must return None, HttpRequest or HttpResponse, got {}".format(type(res).__name__)
+
+
+def _validate_response_result(res):
+    assert res is None or isinstance(res, HttpRequest), \
+        "Response handler must return None or HttpRequest, got {}".format(type(res).__name__)
+
+
+def _validate_error_result(res):
+    assert res is None or isinstance(res, (HttpRequest, HttpResponse)), \
+        "Exception handler must return None, HttpRequest or HttpResponse, got {}".format(type(res).__name__)
+
+
+def _validate_spider_input_result(res):
+    assert res is None, \
+        "Spider input handler must return None, got {}".format(type(res).__name__)
+
+
+def _validate_spider_output_result(res):
+    assert isiterable(res), \
+        "Spider output handler must return an iterable object, got {}".format(type(res).__name__)
+
+
+def _validate_spider_error_result(res):
+    assert res is None or isiterable(res), \
+        "Spider exception handler must return None or an iterable object, got {}".format(type(res).__name__)
+
+
+def _validate_start_requests_result(res):
+    assert isiterable(res), \
+        "Start requests handler must return an iterable object, got {}".format(type(res).__name__)
@@ -1,15 +1,25 @@
 # coding=utf-8
 
+from .batch import *
 from .depth import *
+from .exporter import *
 from .header import *
+from .metrics import *
 from .proxy import *
 from .retry import *
 from .speed_limit import *
+from .sqlite import *
+from .stats import *
 from .user_agent import *
 
-__all__ = (depth.__all__ +
+__all__ = (batch.__all__ +
+           depth.__all__ +
+           exporter.__all__ +
            header.__all__ +
+           metrics.__all__ +
            proxy.__all__ +
            retry.__all__ +
            speed_limit.__all__ +
+           sqlite.__all__ +
+           stats.__all__ +
            user_agent.__all__)
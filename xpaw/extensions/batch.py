@@ -0,0 +1,139 @@
+# coding=utf-8
+
+import time
+import inspect
+import logging
+import asyncio
+
+from xpaw import events
+from xpaw.utils import with_not_none_params
+
+log = logging.getLogger(__name__)
+
+__all__ = ['BatchItemPipeline']
+
+
+class BatchItemPipeline:
+    """
+    Accumulate the items and call ``handle_items(items)`` when there are ``batch_size`` items,
+    or ``batch_timeout`` seconds after the first item of the batch arrived.
+
+    At most ``max_in_flight_batches`` batches are handled concurrently,
+    ``handle_item`` waits when there are ``max_pending_items`` items not handled yet.
+    The remaining items are handled when the crawler is shutting down.
+    """
+
+    def __init__(self, batch_size=100, batch_timeout=1, max_in_flight_batches=2, max_pending_items=None):
+        if batch_size <= 0:
+            raise ValueError('batch_size must be greater than 0')
+        if max_in_flight_batches <= 0:
+            raise ValueError('max_in_flight_batches must be greater than 0')
+        self._batch_size = batch_size
+        self._batch_timeout = batch_timeout
+        self._max_in_flight_batches = max_in_flight_batches
+        if max_pending_items is None:
+            max_pending_items = batch_size * (max_in_flight_batches + 1)
+        self._max_pending_items = max_pending_items
+        self._batch = []
+        self._batch_start = None
+        self._pending_items = 0
+        self._tasks = set()
+        self._semaphore = None
+        self._drained = None
+        self._flush_future = None
+
+    def __repr__(self):
+        cls_name = self.__class__.__name__
+        return '{}(batch_size={}, batch_timeout={}, max_in_flight_batches={}, max_pending_items={})' \
+            .format(cls_name, repr(self._batch_size), repr(self._batch_timeout),
+                    repr(self._max_in_flight_batches), repr(self._max_pending_items))
+
+    @classmethod
+    def from_crawler(cls, crawler):
+        obj = cls(**cls._params_from_config(crawler.config))
+        crawler.event_bus.subscribe(obj.flush, events.crawler_shutdown)
+        return obj
+
+    @classmethod
+    def _params_from_config(cls, config):
+        return with_not_none_params(batch_size=config.getint('item_batch_size'),
+                                    batch_timeout=config.getfloat('item_batch_timeout'),
+                                    max_in_flight_batches=config.getint('item_max_in_flight_batches'),
+                                    max_pending_items=config.getint('item_max_pending_items'))
+
+    def handle_items(self, items):
+        raise NotImplementedError
+
+    def open(self):
+        self._init()
+        if self._batch_timeout:
+            self._flush_future = asyncio.ensure_future(self._flush_periodically())
+
+    def close(self):
+        if self._flush_future:
+            self._flush_future.cancel()
+            self._flush_future = None
+
+    def _init(self):
+        if self._semaphore is None:
+            self._semaphore = asyncio.Semaphore(self._max_in_flight_batches)
+            self._drained = asyncio.Event()
+            self._drained.set()
+
+    async def handle_item(self, item):
+        self._init()
+        if not self._batch:
+            self._batch_start = time.time()
+        self._batch.append(item)
+        self._pending_items += 1
+        if len(self._batch) >= self._batch_size:
+            self._dispatch()
+        if self._pending_items >= self._max_pending_items:
+            # wait until some batches are handled
+            self._dispatch()
+            self._drained.clear()
+            await self._drained.wait()
+
+    async def flush(self):
+        """
+        Handle the accumulated items and wait until all the batches are handled.
+        """
+        self._init()
+        self._dispatch()
+        while self._tasks:
+            await asyncio.wait(list(self._tasks))
+
+    def _dispatch(self):
+        if not self._batch:
+            return
+        batch = self._batch
+        self._batch = []
+        self._batch_start = None
+        task = asyncio.ensure_future(self._handle_batch(batch))
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+
+    async def _handle_batch(self, batch):
+        async with self._semaphore:
+            try:
+                res = self.handle_items(batch)
+                if inspect.isawaitable(res):
+                    await res
+            except asyncio.CancelledError:
+                raise
+            except Exception:
+                log.warning('Failed to handle %s items', len(batch), exc_info=True)
+            finally:
+                self._pending_items -= len(batch)
+                if self._pending_items < self._max_pending_items:
+                    self._drained.set()
+
+    async def _flush_periodically(self):
+        while True:
+            delay = self._batch_timeout
+            if self._batch:
+                delay = self._batch_start + self._batch_timeout - time.time()
+                if delay <= 0:
+                    self._dispatch()
+                    continue
+            await asyncio.sleep(delay)
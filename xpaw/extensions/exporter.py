@@ -0,0 +1,254 @@
+# coding=utf-8
+
+import io
+import csv
+import json
+import gzip
+import logging
+import asyncio
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+
+from xpaw import events
+from xpaw.errors import NotEnabled
+from xpaw.item import BaseItem
+from xpaw.utils import with_not_none_params
+
+try:
+    import zstandard
+except ImportError:
+    zstandard = None
+
+log = logging.getLogger(__name__)
+
+__all__ = ['JsonLinesExporter', 'CsvExporter']
+
+
+class _FeedFile:
+    """
+    Write the data into files, rotate the file when its size exceeds ``max_file_size``.
+    The methods are called in the writer thread.
+    """
+
+    def __init__(self, uri, compression=None, max_file_size=None, header=None):
+        self.uri = uri
+        self.compression = compression
+        self.max_file_size = max_file_size
+        self.header = header
+        self.index = 0
+        self.size = 0
+        self._file = None
+
+    @property
+    def path(self):
+        if '{index}' in self.uri:
+            return self.uri.format(index=self.index)
+        if self.index == 0:
+            return self.uri
+        return '{}.{}'.format(self.uri, self.index)
+
+    def write(self, data):
+        if self._file is None:
+            self._open()
+        self._file.write(data)
+        self.size += len(data)
+        if self.max_file_size and self.size >= self.max_file_size:
+            self.close()
+            self.index += 1
+
+    def _open(self):
+        path = self.path
+        if self.compression == 'gzip':
+            f = gzip.open(path, 'wb')
+        elif self.compression == 'zstd':
+            f = zstandard.ZstdCompressor().stream_writer(open(path, 'wb'))
+        else:
+            f = open(path, 'wb')
+        self._file = f
+        self.size = 0
+        if self.header is not None:
+            header = self.header()
+            if header:
+                self._file.write(header)
+                self.size += len(header)
+
+    def close(self):
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+
+
+class FeedExporter:
+    """
+    The items are serialized on the event loop and buffered, the buffer is written
+    by a single writer thread when it holds ``batch_size`` items or every ``flush_interval`` seconds.
+    The files are flushed only when they are rotated or closed.
+    The remaining items are written when the crawler is shutting down.
+    """
+
+    max_pending_batches = 4
+
+    def __init__(self, uri, compression=None, batch_size=1000, flush_interval=1, max_file_size=None,
+                 stats_collector=None):
+        if compression not in (None, 'gzip', 'zstd'):
+            raise ValueError('Unsupported compression: {}'.format(compression))
+        if compression == 'zstd' and zstandard is None:
+            raise ValueError("zstd compression requires the 'zstandard' package")
+        if batch_size <= 0:
+            raise ValueError('batch_size must be greater than 0')
+        self._uri = uri
+        self._compression = compression
+        self._batch_size = batch_size
+        self._flush_interval = flush_interval
+        self._max_file_size = max_file_size
+        self._stats_collector = stats_collector
+        self._buffer = []
+        self._pending = deque()
+        self._file = _FeedFile(uri, compression=compression, max_file_size=max_file_size, header=self.header)
+        self._executor = None
+        self._flush_future = None
+
+    def __repr__(self):
+        cls_name = self.__class__.__name__
+        return '{}(uri={}, compression={}, batch_size={}, flush_interval={}, max_file_size={})' \
+            .format(cls_name, repr(self._uri), repr(self._compression), repr(self._batch_size),
+                    repr(self._flush_interval), repr(self._max_file_size))
+
+    @classmethod
+    def from_crawler(cls, crawler):
+        config = crawler.config
+        uri = config.get('feed_uri')
+        if not uri:
+            raise NotEnabled
+        obj = cls(uri, stats_collector=crawler.stats_collector,
+                  **with_not_none_params(compression=config.get('feed_compression'),
+                                         batch_size=config.getint('feed_batch_size'),
+                                         flush_interval=config.getfloat('feed_flush_interval'),
+                                         max_file_size=config.getint('feed_max_file_size'),
+                                         **cls._params_from_config(config)))
+        crawler.event_bus.subscribe(obj.drain, events.crawler_shutdown)
+        return obj
+
+    @classmethod
+    def _params_from_config(cls, config):
+        return {}
+
+    def serialize(self, item):
+        raise NotImplementedError
+
+    def header(self):
+        """
+        Return the bytes written at the beginning of each file.
+        """
+
+    def open(self):
+        self._executor = ThreadPoolExecutor(max_workers=1)
+        if self._flush_interval:
+            self._flush_future = asyncio.ensure_future(self._flush_periodically())
+
+    def close(self):
+        if self._flush_future:
+            self._flush_future.cancel()
+            self._flush_future = None
+        if self._executor is not None:
+            # not drained, wait for the writer thread to finish
+            self._submit()
+            self._executor.submit(self._file.close)
+            self._executor.shutdown(wait=True)
+            self._executor = None
+
+    async def drain(self):
+        """
+        Write the remaining items, close the file and wait until the writer thread finishes.
+        """
+        if self._flush_future:
+            self._flush_future.cancel()
+            self._flush_future = None
+        if self._executor is None:
+            return
+        self._submit()
+        self._pending.append(asyncio.get_event_loop().run_in_executor(self._executor, self._file.close))
+        self._executor.shutdown(wait=False)
+        self._executor = None
+        while self._pending:
+            await self._wait_pending()
+
+    async def handle_item(self, item):
+        self._buffer.append(self.serialize(item))
+        if len(self._buffer) >= self._batch_size:
+            await self.flush()
+
+    async def flush(self):
+        self._submit()
+        # only wait when the writer thread falls behind
+        while len(self._pending) > self.max_pending_batches:
+            await self._wait_pending()
+        while self._pending and self._pending[0].done():
+            await self._wait_pending()
+
+    async def _wait_pending(self):
+        # the error belongs to an earlier batch rather than the item being handled, thus log it here
+        try:
+            await self._pending.popleft()
+        except Exception:
+            log.error('Failed to write the items into %s', self._uri, exc_info=True)
+
+    def _submit(self):
+        if not self._buffer:
+            return
+        data = b''.join(self._buffer)
+        n = len(self._buffer)
+        self._buffer = []
+        future = asyncio.get_event_loop().run_in_executor(self._executor, self._file.write, data)
+        self._pending.append(future)
+        if self._stats_collector is not None:
+            self._stats_collector.inc('feed_exported_items', n)
+
+    async def _flush_periodically(self):
+        while True:
+            await asyncio.sleep(self._flush_interval)
+            try:
+                await self.flush()
+            except asyncio.CancelledError:
+                raise
+            except Exception:
+                log.warning('Failed to write the items into %s', self._uri, exc_info=True)
+
+
+class JsonLinesExporter(FeedExporter):
+    def serialize(self, item):
+        if isinstance(item, BaseItem):
+            item = dict(item)
+        return (json.dumps(item, ensure_ascii=False, default=str) + '\n').encode('utf-8')
+
+
+class CsvExporter(FeedExporter):
+    def __init__(self, uri, fields=None, **kwargs):
+        super().__init__(uri, **kwargs)
+        self._fields = list(fields) if fields else None
+        self._csv_buffer = io.StringIO()
+        self._csv_writer = csv.writer(self._csv_buffer)
+
+    @classmethod
+    def _params_from_config(cls, config):
+        return {'fields': config.getlist('feed_fields')}
+
+    def serialize(self, item):
+        if self._fields is None:
+            fields = getattr(item, 'fields', None)
+            self._fields = sorted(fields) if isinstance(fields, dict) else list(item.keys())
+        self._csv_writer.writerow([item.get(k) for k in self._fields])
+        return self._pop_csv_buffer()
+
+    def header(self):
+        # called in the writer thread
+        if self._fields:
+            buf = io.StringIO()
+            csv.writer(buf).writerow(self._fields)
+            return buf.getvalue().encode('utf-8')
+
+    def _pop_csv_buffer(self):
+        data = self._csv_buffer.getvalue().encode('utf-8')
+        self._csv_buffer.seek(0)
+        self._csv_buffer.truncate()
+        return data
@@ -0,0 +1,157 @@
+# coding=utf-8
+
+import re
+import logging
+
+from tornado.web import Application, RequestHandler
+from tornado.httpserver import HTTPServer
+from tornado.netutil import bind_sockets
+
+from xpaw import events
+from xpaw.errors import NotEnabled
+from xpaw.utils import with_not_none_params
+
+log = logging.getLogger(__name__)
+
+__all__ = ['MetricsServer']
+
+_invalid_name_chars = re.compile(r'[^a-zA-Z0-9_]')
+
+
+def _metric_name(name):
+    return 'xpaw_' + _invalid_name_chars.sub('_', name)
+
+
+def _escape_label(value):
+    return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+def _format_labels(labels):
+    if not labels:
+        return ''
+    return '{' + ','.join('{}="{}"'.format(k, _escape_label(v)) for k, v in labels) + '}'
+
+
+def _split_host(key):
+    # the per host keys are like 'download_time/example.com'
+    if '/' in key:
+        name, host = key.split('/', 1)
+        return name, (('host', host),)
+    return key, ()
+
+
+class _MetricsHandler(RequestHandler):
+    def initialize(self, metrics):
+        self.metrics = metrics
+
+    def get(self):
+        self.set_header('Content-Type', 'text/plain; version=0.0.4; charset=utf-8')
+        self.write(self.metrics.render())
+
+
+class MetricsServer:
+    """
+    Serve the stats, queue size, workers, rates and histograms in the Prometheus text format
+    at ``http://<address>:<port>/metrics``, the server runs in the event loop of the crawler.
+    """
+
+    def __init__(self, crawler, port, address='127.0.0.1'):
+        self._crawler = crawler
+        self._stats = crawler.stats_collector
+        self._address = address
+        self.port = port
+        self._server = None
+
+    def __repr__(self):
+        cls_name = self.__class__.__name__
+        return '{}(address={}, port={})'.format(cls_name, repr(self._address), repr(self.port))
+
+    @classmethod
+    def from_crawler(cls, crawler):
+        config = crawler.config
+        port = config.getint('metrics_port')
+        if port is None:
+            raise NotEnabled
+        obj = cls(crawler, port, **with_not_none_params(address=config.get('metrics_address')))
+        crawler.event_bus.subscribe(obj.response_received, events.response_received)
+        return obj
+
+    def response_received(self, response):
+        key = self._stats.host_key('responses', response.url)
+        if key:
+            self._stats.mark(key)
+
+    def open(self):
+        app = Application([(r'/metrics', _MetricsHandler, {'metrics': self})])
+        sockets = bind_sockets(self.port, address=self._address)
+        # the actual port if the port is 0
+        self.port = sockets[0].getsockname()[1]
+        self._server = HTTPServer(app)
+        self._server.add_sockets(sockets)
+        log.info('Serving the metrics at http://%s:%s/metrics', self._address, self.port)
+
+    def close(self):
+        if self._server is not None:
+            self._server.stop()
+            self._server = None
+
+    def render(self):
+        lines = []
+        names = set()
+        self._render_crawler(lines, names)
+        self._render_histograms(lines, names)
+        self._render_rates(lines, names)
+        self._render_stats(lines, names)
+        return ''.join(lines)
+
+    def _render_crawler(self, lines, names):
+        queue = getattr(self._crawler, 'queue', None)
+        if queue is not None:
+            self._add_metric(lines, names, 'queue_size', 'gauge', [((), len(queue))])
+        runner = getattr(self._crawler, 'runner', None)
+        if runner is not None:
+            self._add_metric(lines, names, 'workers', 'gauge', [((), runner.workers)])
+            self._add_metric(lines, names, 'in_flight_requests', 'gauge', [((), runner.in_flight)])
+            self._add_metric(lines, names, 'worker_utilization', 'gauge', [((), runner.worker_utilization)])
+
+    def _render_stats(self, lines, names):
+        histograms = self._stats.histograms
+        for key, value in sorted(self._stats.stats.items()):
+            # skip the summaries of histograms
+            if isinstance(value, (int, float)) and key.rsplit('/', 1)[0] not in histograms:
+                self._add_metric(lines, names, key, 'untyped', [((), value)])
+
+    def _render_rates(self, lines, names):
+        metrics = {}
+        for key, c in self._stats.rates.items():
+            name, labels = _split_host(key)
+            metrics.setdefault(name, []).append((labels, c.rate()))
+        for name in sorted(metrics):
+            self._add_metric(lines, names, name + '_per_second', 'gauge', metrics[name])
+
+    def _render_histograms(self, lines, names):
+        metrics = {}
+        for key, h in self._stats.histograms.items():
+            name, labels = _split_host(key)
+            metrics.setdefault(name, []).append((labels, h))
+        for name in sorted(metrics):
+            metric = _metric_name(name)
+            names.update((metric, metric + '_sum', metric + '_count'))
+            lines.append('# TYPE {} summary\n'.format(metric))
+            for labels, h in metrics[name]:
+                for q in (0.5, 0.95, 0.99):
+                    v = h.percentile(q * 100)
+                    if v is not None:
+                        lines.append('{}{} {}\n'.format(metric, _format_labels(labels + (('quantile', q),)), v))
+                lines.append('{}_sum{} {}\n'.format(metric, _format_labels(labels), h.sum))
+                lines.append('{}_count{} {}\n'.format(metric, _format_labels(labels), h.count))
+
+    @staticmethod
+    def _add_metric(lines, names, name, metric_type, samples):
+        metric = _metric_name(name)
+        if metric in names:
+            return
+        names.add(metric)
+        lines.append('# TYPE {} {}\n'.format(metric, metric_type))
+        for labels, value in samples:
+            lines.append('{}{} {}\n'.format(metric, _format_labels(labels), float(value)))
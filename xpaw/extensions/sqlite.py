@@ -0,0 +1,84 @@
+# coding=utf-8
+
+import json
+import logging
+import asyncio
+from concurrent.futures import ThreadPoolExecutor
+
+from xpaw.errors import NotEnabled
+from xpaw.item import BaseItem
+from xpaw.utils import open_sqlite
+from .batch import BatchItemPipeline
+
+log = logging.getLogger(__name__)
+
+__all__ = ['SqliteItemPipeline']
+
+
+class SqliteItemPipeline(BatchItemPipeline):
+    """
+    Store the items into the ``table`` of a SQLite database as JSON text,
+    which can be queried by the JSON functions of SQLite, e.g. ``json_extract(data, '$.name')``.
+    The items are serialized on the event loop, and each batch is inserted in a single transaction
+    by a writer thread which owns the connection.
+    """
+
+    def __init__(self, path, table='items', **kwargs):
+        super().__init__(**kwargs)
+        self._path = path
+        self._table = table
+        self._insert_sql = 'INSERT INTO "{}" (type, data) VALUES (?, ?)'.format(table)
+        self._conn = None
+        self._executor = None
+
+    def __repr__(self):
+        cls_name = self.__class__.__name__
+        return '{}(path={}, table={}, batch_size={})'.format(cls_name, repr(self._path), repr(self._table),
+                                                              repr(self._batch_size))
+
+    @classmethod
+    def _params_from_config(cls, config):
+        path = config.get('sqlite_path')
+        if not path:
+            raise NotEnabled
+        params = super()._params_from_config(config)
+        params['path'] = path
+        table = config.get('sqlite_item_table')
+        if table:
+            params['table'] = table
+        return params
+
+    def open(self):
+        self._executor = ThreadPoolExecutor(max_workers=1)
+        super().open()
+
+    def close(self):
+        super().close()
+        if self._executor is not None:
+            # the batches have been handled when the crawler is shutting down
+            self._executor.submit(self._close_conn)
+            self._executor.shutdown(wait=True)
+            self._executor = None
+
+    async def handle_items(self, items):
+        rows = []
+        for item in items:
+            t = type(item).__name__
+            if isinstance(item, BaseItem):
+                item = dict(item)
+            rows.append((t, json.dumps(item, ensure_ascii=False, default=str)))
+        await asyncio.get_event_loop().run_in_executor(self._executor, self._insert, rows)
+
+    def _insert(self, rows):
+        # called in the writer thread
+        if self._conn is None:
+            self._conn = open_sqlite(self._path)
+            self._conn.execute('CREATE TABLE IF NOT EXISTS "{}" (id INTEGER PRIMARY KEY AUTOINCREMENT, '
+                               'type TEXT, data TEXT NOT NULL)'.format(self._table))
+        self._conn.executemany(self._insert_sql, rows)
+        self._conn.commit()
+
+    def _close_conn(self):
+        if self._conn is not None:
+            self._conn.close()
+            self._conn = None
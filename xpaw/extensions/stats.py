@@ -0,0 +1,163 @@
+# coding=utf-8
+
+import time
+import logging
+import asyncio
+
+from xpaw import events
+from xpaw.errors import NotEnabled
+
+log = logging.getLogger(__name__)
+
+__all__ = ['CoreStats', 'StatsReporter']
+
+
+def _format_size(n):
+    for unit in ('B', 'KB', 'MB', 'GB'):
+        if abs(n) < 1024:
+            return '{:.1f} {}'.format(n, unit)
+        n /= 1024
+    return '{:.1f} TB'.format(n)
+
+
+class CoreStats:
+    """
+    Count the requests, responses, status codes, downloaded bytes, retries, duplicated requests and items
+    from the events, and log all the stats when the crawler is shutting down.
+    """
+
+    def __init__(self, stats_collector):
+        self._stats = stats_collector
+        self._start_time = None
+
+    def __repr__(self):
+        return '{}()'.format(self.__class__.__name__)
+
+    @classmethod
+    def from_crawler(cls, crawler):
+        if not crawler.config.getbool('core_stats_enabled'):
+            raise NotEnabled
+        obj = cls(crawler.stats_collector)
+        event_bus = crawler.event_bus
+        event_bus.subscribe(obj.request_scheduled, events.request_scheduled)
+        event_bus.subscribe(obj.request_duplicated, events.request_duplicated)
+        event_bus.subscribe(obj.request_ignored, events.request_ignored)
+        event_bus.subscribe(obj.response_received, events.response_received)
+        event_bus.subscribe(obj.item_scraped, events.item_scraped)
+        event_bus.subscribe(obj.item_ignored, events.item_ignored)
+        return obj
+
+    def open(self):
+        self._start_time = time.time()
+        self._stats.set('start_time', self._start_time)
+
+    def close(self):
+        finish_time = time.time()
+        self._stats.set('finish_time', finish_time)
+        if self._start_time is not None:
+            self._stats.set('elapsed_time', finish_time - self._start_time)
+        stats = self._stats.stats
+        log.info('Stats:%s', ''.join('\n\t{}: {}'.format(k, stats[k]) for k in sorted(stats)))
+
+    def request_scheduled(self, request):
+        self._stats.inc('request_count')
+        if request.get_meta('retry_times'):
+            self._stats.inc('retry_count')
+
+    def request_duplicated(self, request):
+        self._stats.inc('request_dupe_count')
+
+    def request_ignored(self, request, error):
+        self._stats.inc('request_ignored_count')
+
+    def response_received(self, response):
+        self._stats.inc('response_count')
+        self._stats.inc('response_status_count/{}'.format(response.status))
+        if response.body:
+            self._stats.inc('response_bytes', len(response.body))
+
+    def item_scraped(self, item):
+        self._stats.inc('item_count')
+
+    def item_ignored(self, item, error):
+        self._stats.inc('item_ignored_count')
+
+
+class StatsReporter:
+    """
+    Mark the scheduled requests, received responses, scraped items and downloaded bytes
+    in the rate counters of stats collector, and log the progress every ``interval`` seconds.
+    """
+
+    def __init__(self, crawler, interval=60):
+        if interval <= 0:
+            raise ValueError('interval must be greater than 0')
+        self._crawler = crawler
+        self._stats = crawler.stats_collector
+        self._interval = interval
+        self._report_future = None
+
+    def __repr__(self):
+        cls_name = self.__class__.__name__
+        return '{}(interval={})'.format(cls_name, repr(self._interval))
+
+    @classmethod
+    def from_crawler(cls, crawler):
+        interval = crawler.config.getfloat('stats_report_interval')
+        if not interval:
+            raise NotEnabled
+        obj = cls(crawler, interval=interval)
+        crawler.event_bus.subscribe(obj.request_scheduled, events.request_scheduled)
+        crawler.event_bus.subscribe(obj.response_received, events.response_received)
+        crawler.event_bus.subscribe(obj.item_scraped, events.item_scraped)
+        return obj
+
+    def request_scheduled(self, request):
+        self._stats.mark('requests')
+
+    def response_received(self, response):
+        self._stats.mark('responses')
+        if response.body:
+            self._stats.mark('response_bytes', len(response.body))
+
+    def item_scraped(self, item):
+        self._stats.mark('items')
+
+    def open(self):
+        self._report_future = asyncio.ensure_future(self._report_periodically())
+
+    def close(self):
+        if self._report_future:
+            self._report_future.cancel()
+            self._report_future = None
+        self.report()
+
+    def report(self):
+        stats = self._stats
+        rates = stats.rates
+
+        def total(key):
+            c = rates.get(key)
+            return c.total if c is not None else 0
+
+        queue = self._crawler.queue
+        runner = self._crawler.runner
+        log.info('Requests: %s (%.1f/s), responses: %s (%.1f/s), items: %s (%.1f/s), '
+                 'downloaded: %s (%s/s), queue: %s, in-flight: %s',
+                 total('requests'), stats.get_rate('requests', self._interval),
+                 total('responses'), stats.get_rate('responses', self._interval),
+                 total('items'), stats.get_rate('items', self._interval),
+                 _format_size(total('response_bytes')),
+                 _format_size(stats.get_rate('response_bytes', self._interval)),
+                 len(queue) if queue is not None else 0,
+                 runner.in_flight if runner is not None else 0)
+
+    async def _report_periodically(self):
+        while True:
+            await asyncio.sleep(self._interval)
+            try:
+                self.report()
+            except asyncio.CancelledError:
+                raise
+            except Exception:
+                log.warning('Failed to report the stats', exc_info=True)
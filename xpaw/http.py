@@ -4,12 +4,36 @@ import inspect
 
 from tornado.httputil import HTTPHeaders as _HttpHeaders
 
-from .utils import get_encoding_from_content, get_encoding_from_content_type, make_url
+from lxml import etree
+
+from .utils import detect_encoding, make_url
+from .selector import Selector, create_root_node
 
 HttpHeaders = _HttpHeaders
 
 
+def make_headers(headers):
+    if isinstance(headers, HttpHeaders):
+        return headers
+    res = HttpHeaders()
+    if isinstance(headers, dict):
+        for k, v in headers.items():
+            if isinstance(v, (tuple, list)):
+                for i in v:
+                    res.add(k, i)
+            else:
+                res.add(k, v)
+    elif isinstance(headers, (tuple, list)):
+        for k, v in headers:
+            res.add(k, v)
+    return res
+
+
 class HttpRequest:
+    __slots__ = ('url', 'method', 'body', '_headers', 'proxy', 'timeout', 'verify_ssl', 'allow_redirects',
+                 'auth', 'proxy_auth', 'priority', 'dont_filter', 'callback', 'errback', '_meta', 'render',
+                 '_scheduled_time')
+
     def __init__(self, url, method="GET", body=None, params=None, headers=None, proxy=None,
                  timeout=20, verify_ssl=False, allow_redirects=True, auth=None, proxy_auth=None,
                  priority=None, dont_filter=False, callback=None, errback=None, meta=None,
@@ -20,7 +44,7 @@ class HttpRequest:
         self.url = make_url(url, params)
         self.method = method
         self.body = body
-        self.headers = headers
+        self._headers = headers
         self.proxy = proxy
         self.timeout = timeout
         self.verify_ssl = verify_ssl
@@ -31,7 +55,7 @@ class HttpRequest:
         self.dont_filter = dont_filter
         self.callback = callback
         self.errback = errback
-        self._meta = dict(meta) if meta else {}
+        self._meta = dict(meta) if meta else None
         self.render = render
 
     def __str__(self):
@@ -41,18 +65,69 @@ class HttpRequest:
 
     @property
     def meta(self):
+        if self._meta is None:
+            self._meta = {}
         return self._meta
 
+    def get_meta(self, key, default=None):
+        """
+        Get the value of a key in meta without creating the dict.
+        """
+        if self._meta is None:
+            return default
+        return self._meta.get(key, default)
+
+    @property
+    def headers(self):
+        """
+        The headers are converted to :class:`HttpHeaders` when they are accessed.
+        """
+        if type(self._headers) is not HttpHeaders:
+            self._headers = make_headers(self._headers)
+        return self._headers
+
+    @headers.setter
+    def headers(self, value):
+        self._headers = value
+
     def copy(self):
         return self.replace()
 
+    _fields = ("url", "method", "body", "headers", "proxy",
+               "timeout", "verify_ssl", "allow_redirects", "auth", "proxy_auth",
+               "priority", "dont_filter", "callback", "errback", "meta",
+               "render")
+
     def replace(self, **kwargs):
-        for i in ["url", "method", "body", "headers", "proxy",
-                  "timeout", "verify_ssl", "allow_redirects", "auth", "proxy_auth",
-                  "priority", "dont_filter", "callback", "errback", "meta",
-                  "render"]:
-            kwargs.setdefault(i, getattr(self, i))
-        return type(self)(**kwargs)
+        if type(self) is not HttpRequest or not all(k in self._fields for k in kwargs):
+            for i in self._fields:
+                kwargs.setdefault(i, getattr(self, i))
+            return type(self)(**kwargs)
+        # share the unchanged fields without calling the constructor
+        obj = HttpRequest.__new__(HttpRequest)
+        obj.url = self.url
+        obj.method = self.method
+        obj.body = self.body
+        obj._headers = self._headers
+        obj.proxy = self.proxy
+        obj.timeout = self.timeout
+        obj.verify_ssl = self.verify_ssl
+        obj.allow_redirects = self.allow_redirects
+        obj.auth = self.auth
+        obj.proxy_auth = self.proxy_auth
+        obj.priority = self.priority
+        obj.dont_filter = self.dont_filter
+        obj.callback = self.callback
+        obj.errback = self.errback
+        obj._meta = dict(self._meta) if self._meta else None
+        obj.render = self.render
+        for k, v in kwargs.items():
+            if k == 'url':
+                v = make_url(v)
+            elif k == 'meta':
+                k, v = '_meta', dict(v) if v else None
+            setattr(obj, k, v)
+        return obj
 
     def to_dict(self):
         callback = self.callback
@@ -87,6 +162,8 @@ class HttpRequest:
 
 
 class HttpResponse:
+    __slots__ = ('url', 'status', 'body', '_headers', 'request', '_encoding', '_text', '_selector')
+
     def __init__(self, url, status, body=None, headers=None,
                  request=None, encoding=None):
         """
@@ -95,23 +172,34 @@ class HttpResponse:
         self.url = url
         self.status = status
         self.body = body
-        self.headers = headers
+        self._headers = headers
         self.request = request
-        self._encoding = encoding
+        self._encoding = encoding or None
+        self._text = None
+        self._selector = None
 
     def __str__(self):
         return '<{}, {}>'.format(self.status, self.url)
 
     __repr__ = __str__
 
+    @property
+    def headers(self):
+        if type(self._headers) is not HttpHeaders:
+            self._headers = make_headers(self._headers)
+        return self._headers
+
+    @headers.setter
+    def headers(self, value):
+        self._headers = value
+
     @property
     def encoding(self):
-        if self._encoding:
-            return self._encoding
-        encoding = get_encoding_from_content_type(self.headers.get("Content-Type"))
-        if not encoding and self.body:
-            encoding = get_encoding_from_content(self.body)
-        return encoding or 'utf-8'
+        if self._encoding is None:
+            content_type = self.headers.get("Content-Type")
+            body = self.body if isinstance(self.body, bytes) else None
+            self._encoding = detect_encoding(body, content_type=content_type)
+        return self._encoding
 
     @encoding.setter
     def encoding(self, value):
@@ -119,16 +207,42 @@ class HttpResponse:
 
     @property
     def text(self):
-        if hasattr(self, "_text") and self._text:
-            return self._text
-        if not self.body:
-            return ""
-        if isinstance(self.body, bytes):
-            self._text = self.body.decode(self.encoding, errors="replace")
-        else:
-            self._text = self.body
+        if self._text is None:
+            if not self.body:
+                return ""
+            if isinstance(self.body, bytes):
+                text = self.body.decode(self.encoding, errors="replace")
+                if text.startswith('\ufeff'):
+                    text = text[1:]
+                self._text = text
+            else:
+                self._text = self.body
         return self._text
 
+    @property
+    def selector(self):
+        """
+        The HTML selector of the response, which is created only once.
+        """
+        if self._selector is None:
+            root = None
+            if isinstance(self.body, bytes) and self.body:
+                # parse the body with the known encoding, avoid decoding the body first
+                try:
+                    root = create_root_node(self.body, etree.HTMLParser, encoding=self.encoding)
+                except (LookupError, etree.LxmlError):
+                    pass
+            if root is None:
+                root = create_root_node(self.text, etree.HTMLParser)
+            self._selector = Selector(root=root)
+        return self._selector
+
+    def xpath(self, xpath, **kwargs):
+        return self.selector.xpath(xpath, **kwargs)
+
+    def css(self, css, **kwargs):
+        return self.selector.css(css, **kwargs)
+
     @property
     def meta(self):
         if self.request:
@@ -137,7 +251,23 @@ class HttpResponse:
     def copy(self):
         return self.replace()
 
+    _fields = ("url", "status", "body", "headers", "request")
+
     def replace(self, **kwargs):
-        for i in ["url", "status", "body", "headers", "request"]:
-            kwargs.setdefault(i, getattr(self, i))
-        return type(self)(**kwargs)
+        if type(self) is not HttpResponse or not all(k in self._fields for k in kwargs):
+            for i in self._fields:
+                kwargs.setdefault(i, getattr(self, i))
+            return type(self)(**kwargs)
+        # share the unchanged fields without calling the constructor
+        obj = HttpResponse.__new__(HttpResponse)
+        obj.url = self.url
+        obj.status = self.status
+        obj.body = self.body
+        obj._headers = self._headers
+        obj.request = self.request
+        obj._encoding = None
+        obj._text = None
+        obj._selector = None
+        for k, v in kwargs.items():
+            setattr(obj, k, v)
+        return obj
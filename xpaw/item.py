@@ -1,6 +1,7 @@
 # coding=utf-8
 
-from collections import MutableMapping
+from abc import ABCMeta
+from collections.abc import MutableMapping
 
 from . import config
 
@@ -10,6 +11,8 @@ class BaseItem:
     Super class for all items.
     """
 
+    __slots__ = ()
+
 
 class Field(dict):
     """
@@ -17,46 +20,69 @@ class Field(dict):
     """
 
 
-class Item(MutableMapping, BaseItem):
-    def __init__(self, **kwargs):
-        self.fields = {}
-        for k in dir(self):
-            v = getattr(self, k)
+_type_converters = {
+    'str': str,
+    'int': config.getint,
+    'float': config.getfloat,
+    'bool': config.getbool
+}
+
+
+def _make_converter(t):
+    if isinstance(t, str):
+        if t in _type_converters:
+            return _type_converters[t]
+
+        def unsupported_type(v):
+            raise ValueError('Unsupported item filed type: {}'.format(t))
+
+        return unsupported_type
+    return t
+
+
+class ItemMeta(ABCMeta):
+    """
+    Collect the fields and their type converters once per item class.
+    """
+
+    def __new__(mcs, name, bases, attrs):
+        cls = super().__new__(mcs, name, bases, attrs)
+        fields = {}
+        for k in dir(cls):
+            v = getattr(cls, k)
             if isinstance(v, Field):
-                self.fields[k] = v
+                fields[k] = v
+        cls.fields = fields
+        cls._converters = {k: _make_converter(v['type']) for k, v in fields.items() if v.get('type')}
+        return cls
+
+
+class Item(MutableMapping, BaseItem, metaclass=ItemMeta):
+    """
+    The type of a field is converted when the value is assigned.
+    Define ``__slots__ = ()`` in subclasses to store the items without ``__dict__``.
+    """
+
+    __slots__ = ('values',)
+
+    def __init__(self, **kwargs):
         self.values = {}
         for k, v in kwargs.items():
             self[k] = v
 
     def __getitem__(self, key):
-        if key not in self:
-            return None
-        v = self.values[key]
-        t = self.fields[key].get('type')
-        if t:
-            if isinstance(t, str):
-                if t == 'str':
-                    v = str(v)
-                elif t == 'int':
-                    v = config.getint(v)
-                elif t == 'float':
-                    v = config.getfloat(v)
-                elif t == 'bool':
-                    v = config.getbool(v)
-                else:
-                    raise ValueError('Unsupported item filed type: {}'.format(t))
-            else:
-                v = t(v)
-        return v
+        return self.values.get(key)
 
     def __contains__(self, name):
         return name in self.values
 
     def __setitem__(self, key, value):
-        if key in self.fields:
-            self.values[key] = value
-        else:
+        if key not in self.fields:
             raise KeyError(key)
+        c = self._converters.get(key)
+        if c is not None:
+            value = c(value)
+        self.values[key] = value
 
     def __delitem__(self, key):
         del self.values[key]
@@ -74,4 +100,7 @@ class Item(MutableMapping, BaseItem):
         return repr(dict(self))
 
     def copy(self):
-        return self.__class__(**self.values)
+        obj = self.__class__()
+        # the values have been converted
+        obj.values = dict(self.values)
+        return obj
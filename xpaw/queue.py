@@ -1,12 +1,15 @@
 # coding=utf-8
 
 import time
+import pickle
 import logging
 from asyncio import Semaphore
 from collections import deque
 from heapq import heappush, heappop
 
-from .utils import cmp
+from .utils import cmp, open_sqlite, with_not_none_params
+from .http import HttpRequest
+from . import events
 
 log = logging.getLogger(__name__)
 
@@ -53,6 +56,8 @@ class PriorityQueue:
 
 
 class _PriorityQueueItem:
+    __slots__ = ('request', 'priority', 'now')
+
     def __init__(self, request):
         self.request = request
         self.priority = self.request.priority or 0
@@ -63,3 +68,100 @@ class _PriorityQueueItem:
 
     def __lt__(self, other):
         return self.__cmp__(other) < 0
+
+
+class SqliteQueue:
+    """
+    Priority queue persisted in a SQLite database, thus the crawl can be resumed after restart.
+
+    The pushed requests are written in a single transaction every ``batch_size`` requests,
+    and ``batch_size`` requests of the highest priority are read when the read buffer is empty.
+
+    The rows are deleted only after the requests are popped, in the transaction of the next read or on close,
+    so the buffered requests stay in the database.
+    If the process crashes, the requests popped since the last read are crawled again after restart,
+    while the requests which have been popped before the last read but are still being crawled are lost.
+    """
+
+    def __init__(self, path, batch_size=100):
+        if batch_size <= 0:
+            raise ValueError('batch_size must be greater than 0')
+        self._path = path
+        self._batch_size = batch_size
+        self._conn = open_sqlite(path)
+        self._conn.execute('CREATE TABLE IF NOT EXISTS requests '
+                           '(id INTEGER PRIMARY KEY AUTOINCREMENT, priority INTEGER NOT NULL, data BLOB NOT NULL)')
+        self._conn.execute('CREATE INDEX IF NOT EXISTS requests_priority ON requests (priority DESC, id)')
+        self._conn.commit()
+        self._size = self._conn.execute('SELECT COUNT(*) FROM requests').fetchone()[0]
+        self._write_buffer = []
+        self._read_buffer = deque()
+        self._popped_ids = []
+        self._semaphore = Semaphore(self._size)
+
+    def __repr__(self):
+        cls_name = self.__class__.__name__
+        return '{}(path={}, batch_size={})'.format(cls_name, repr(self._path), repr(self._batch_size))
+
+    @classmethod
+    def from_crawler(cls, crawler):
+        config = crawler.config
+        path = config.get('sqlite_path')
+        if not path:
+            raise ValueError("'sqlite_path' is required by {}".format(cls.__name__))
+        obj = cls(path, **with_not_none_params(batch_size=config.getint('sqlite_batch_size')))
+        crawler.event_bus.subscribe(obj.close, events.crawler_shutdown)
+        return obj
+
+    def __len__(self):
+        return self._size + len(self._write_buffer) + len(self._read_buffer)
+
+    async def push(self, request):
+        data = pickle.dumps(request.to_dict(), protocol=pickle.HIGHEST_PROTOCOL)
+        self._write_buffer.append((request.priority or 0, data))
+        if len(self._write_buffer) >= self._batch_size:
+            self._write()
+        self._semaphore.release()
+
+    async def pop(self):
+        await self._semaphore.acquire()
+        if not self._read_buffer:
+            # the requests to write may have higher priority
+            self._write()
+            self._read()
+        row_id, data = self._read_buffer.popleft()
+        self._popped_ids.append((row_id,))
+        return HttpRequest.from_dict(pickle.loads(data))
+
+    def close(self):
+        if self._conn is None:
+            return
+        self._write()
+        # the buffered requests are still in the database
+        self._delete_popped()
+        self._conn.commit()
+        self._read_buffer.clear()
+        self._conn.close()
+        self._conn = None
+
+    def _write(self):
+        if not self._write_buffer:
+            return
+        self._conn.executemany('INSERT INTO requests (priority, data) VALUES (?, ?)', self._write_buffer)
+        self._conn.commit()
+        self._size += len(self._write_buffer)
+        self._write_buffer = []
+
+    def _read(self):
+        # the read buffer is empty, thus all the rows read last time have been popped
+        self._delete_popped()
+        rows = self._conn.execute('SELECT id, data FROM requests ORDER BY priority DESC, id LIMIT ?',
+                                  (self._batch_size,)).fetchall()
+        self._conn.commit()
+        self._size -= len(rows)
+        self._read_buffer.extend(rows)
+
+    def _delete_popped(self):
+        if self._popped_ids:
+            self._conn.executemany('DELETE FROM requests WHERE id = ?', self._popped_ids)
+            self._popped_ids = []
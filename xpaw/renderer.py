@@ -1,13 +1,19 @@
 # coding=utf-8
 
+import os
+import time
+import json
 import asyncio
-from threading import Thread
-from collections import deque
+import hashlib
+from os.path import join, isfile, getsize, getmtime
+from threading import Thread, Lock, get_ident
+from collections import deque, OrderedDict
 import logging
 
 from selenium.webdriver import Chrome, ChromeOptions
 
 from .http import HttpResponse, HttpHeaders
+from .utils import request_fingerprint, to_bytes
 
 log = logging.getLogger(__name__)
 
@@ -17,7 +23,8 @@ class ChromeRenderer:
                          '--disable-gpu', '--no-sandbox']
     default_prefs = {'profile.managed_default_content_settings.images': 2}
 
-    def __init__(self, options=None):
+    def __init__(self, options=None, cache=None):
+        self.cache = cache
         self.options = {'default': self.make_chrome_options()}
         if options:
             for k, v in options.items():
@@ -40,18 +47,39 @@ class ChromeRenderer:
     def _run_fetch_thread(self, loop, lock, request):
         driver_instance = None
         try:
+            # the cached page is loaded from disk, thus look up the cache in the thread as well
+            if self.cache is not None and not request.get_meta('dont_cache'):
+                response = self._get_cached_response(request)
+                if response is not None:
+                    log.debug('Use cached rendering result of %s', request)
+                    loop.call_soon_threadsafe(lock.set_result, response)
+                    return
             driver_instance = self.get_driver_instance(request)
             driver = driver_instance.driver
             driver.get(request.url)
             response = HttpResponse(driver.current_url, 200, body=driver.page_source.encode('utf-8'),
                                     headers=HttpHeaders(), request=request)
             self.push_driver_instance(driver_instance)
+            if self.cache is not None and not request.get_meta('dont_cache'):
+                self._cache_response(request, response)
             loop.call_soon_threadsafe(lock.set_result, response)
         except Exception as e:
             if driver_instance:
                 driver_instance.destroy_driver()
             loop.call_soon_threadsafe(lock.set_result, e)
 
+    def _get_cached_response(self, request):
+        try:
+            return self.cache.get(request, self.get_driver_name(request))
+        except Exception as e:
+            log.warning('Cannot load cached rendering result of %s: %s', request, e)
+
+    def _cache_response(self, request, response):
+        try:
+            self.cache.set(request, self.get_driver_name(request), response)
+        except Exception as e:
+            log.warning('Cannot cache rendering result of %s: %s', request, e)
+
     def make_chrome_options(self, arguments=None, experimental_options=None):
         chrome_options = ChromeOptions()
         if arguments is None:
@@ -145,3 +173,117 @@ class DriverInstance:
             self.driver.quit()
         except Exception as e:
             log.warning('Cannot quit driver: %s', e)
+
+
+class RenderCache:
+    """
+    On-disk cache of rendered pages keyed by request fingerprint and renderer name.
+    Each file holds a line of JSON header followed by the raw body.
+    """
+
+    def __init__(self, cache_dir, ttl=None, max_size=None):
+        self.cache_dir = cache_dir
+        self.ttl = ttl
+        self.max_size = max_size
+        os.makedirs(self.cache_dir, exist_ok=True)
+        self._lock = Lock()
+        # key -> file size, ordered from the least recently used one
+        self._entries = OrderedDict()
+        self._size = 0
+        self._load_entries()
+
+    def __len__(self):
+        return len(self._entries)
+
+    @property
+    def size(self):
+        return self._size
+
+    def _load_entries(self):
+        files = []
+        for name in os.listdir(self.cache_dir):
+            path = join(self.cache_dir, name)
+            if name.endswith('.tmp') or not isfile(path):
+                continue
+            files.append((getmtime(path), name, getsize(path)))
+        files.sort()
+        for _, name, size in files:
+            self._entries[name] = size
+            self._size += size
+        self._evict()
+
+    def make_key(self, request, name):
+        sha1 = hashlib.sha1()
+        sha1.update(to_bytes(name))
+        sha1.update(to_bytes(request_fingerprint(request)))
+        return sha1.hexdigest()
+
+    def get(self, request, name):
+        key = self.make_key(request, name)
+        path = join(self.cache_dir, key)
+        with self._lock:
+            if key not in self._entries:
+                return
+            if self.ttl is not None:
+                try:
+                    expired = getmtime(path) + self.ttl < time.time()
+                except OSError:
+                    # the file is removed by others
+                    expired = True
+                if expired:
+                    self._remove(key)
+                    return
+            self._entries.move_to_end(key)
+        try:
+            with open(path, 'rb') as f:
+                header, body = f.read().split(b'\n', 1)
+            d = json.loads(header.decode('utf-8'))
+        except Exception as e:
+            log.warning('Cannot load cached rendering result %s: %s', path, e)
+            with self._lock:
+                self._remove(key)
+            return
+        headers = HttpHeaders()
+        for k, v in d['headers']:
+            headers.add(k, v)
+        if d.get('no_body'):
+            body = None
+        return HttpResponse(d['url'], d['status'], body=body, headers=headers, request=request)
+
+    def set(self, request, name, response):
+        key = self.make_key(request, name)
+        path = join(self.cache_dir, key)
+        headers = response.headers.get_all() if response.headers is not None else ()
+        header = {'url': response.url,
+                  'status': response.status,
+                  'headers': list(headers)}
+        if response.body is None:
+            header['no_body'] = True
+        data = json.dumps(header).encode('utf-8') + b'\n' + to_bytes(response.body or b'')
+        tmp_path = '{}.{}.tmp'.format(path, get_ident())
+        with open(tmp_path, 'wb') as f:
+            f.write(data)
+        os.replace(tmp_path, path)
+        with self._lock:
+            self._size -= self._entries.pop(key, 0)
+            self._entries[key] = len(data)
+            self._size += len(data)
+            self._evict()
+
+    def clear(self):
+        with self._lock:
+            for key in list(self._entries):
+                self._remove(key)
+
+    def _evict(self):
+        if self.max_size is None:
+            return
+        while self._size > self.max_size and self._entries:
+            self._remove(next(iter(self._entries)))
+
+    def _remove(self, key):
+        self._size -= self._entries.pop(key, 0)
+        try:
+            os.remove(join(self.cache_dir, key))
+        except OSError:
+            pass
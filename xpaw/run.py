@@ -5,6 +5,7 @@ import os
 from os.path import join, isfile
 import sys
 import signal
+import asyncio
 
 from tornado.ioloop import IOLoop
 
@@ -12,6 +13,7 @@ from .config import Config, DEFAULT_CONFIG
 from .crawler import CrawlerRunner, Crawler
 from .utils import configure_logger, configure_tornado_logger, daemonize, load_config, iter_settings
 from .spider import RequestsSpider
+from .session import Session
 
 log = logging.getLogger(__name__)
 
@@ -60,6 +62,42 @@ def make_requests(requests, **kwargs):
     return results
 
 
+def iter_requests(requests, max_in_flight=None, **kwargs):
+    """
+    Yield ``(index, result)`` in the order of completion, the result is a response or an error.
+    The requests are taken lazily and at most ``max_in_flight`` requests are downloaded at the same time,
+    thus the memory is bounded no matter how many requests there are.
+    The downloads are paused while the caller is handling the result.
+    """
+    if 'log_level' not in kwargs:
+        kwargs['log_level'] = 'WARNING'
+    config = Config(DEFAULT_CONFIG)
+    config.update(kwargs)
+    logger = configure_logger('xpaw', config)
+    configure_tornado_logger(logger.handlers)
+
+    async def create_session():
+        # the downloader is bound to the running loop
+        return Session(**kwargs)
+
+    loop = asyncio.new_event_loop()
+    try:
+        session = loop.run_until_complete(create_session())
+        results = session.as_completed(requests, max_in_flight=max_in_flight)
+        try:
+            while True:
+                try:
+                    res = loop.run_until_complete(results.__anext__())
+                except StopAsyncIteration:
+                    break
+                yield res
+        finally:
+            loop.run_until_complete(results.aclose())
+            loop.run_until_complete(session.close())
+    finally:
+        loop.close()
+
+
 def load_project_config(proj_dir):
     if proj_dir is not None and proj_dir not in sys.path:
         # add project path
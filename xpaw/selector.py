@@ -1,5 +1,10 @@
 # coding=utf-8
 
+import re
+import threading
+from io import BytesIO
+from functools import lru_cache
+
 from lxml import etree, cssselect
 
 _text_type_config = {
@@ -22,8 +27,46 @@ def _get_text_type(text_type):
     raise ValueError('Invalid text type: {}'.format(text_type))
 
 
-def create_root_node(text, parser_cls):
-    return etree.fromstring(text, parser=parser_cls())
+@lru_cache(maxsize=1024)
+def _css_to_xpath(text_type, css):
+    return _text_type_config[text_type]['css_translator'].css_to_xpath(css)
+
+
+@lru_cache(maxsize=1024)
+def _compile_xpath(xpath, namespaces, regexp, smart_strings, thread_id):
+    # XPath evaluators are not shared between threads
+    return etree.XPath(xpath, namespaces=dict(namespaces) if namespaces else None,
+                       regexp=regexp, smart_strings=smart_strings)
+
+
+def _get_xpath_evaluator(xpath, namespaces=None, regexp=True, smart_strings=False):
+    if namespaces:
+        namespaces = tuple(sorted(namespaces.items()))
+    return _compile_xpath(xpath, namespaces, regexp, smart_strings, threading.get_ident())
+
+
+_local = threading.local()
+
+
+def _get_parser(parser_cls, encoding=None):
+    # parsers are reused in the same thread
+    parsers = getattr(_local, 'parsers', None)
+    if parsers is None:
+        parsers = _local.parsers = {}
+    key = (parser_cls, encoding)
+    parser = parsers.get(key)
+    if parser is None:
+        parser = parsers[key] = parser_cls(encoding=encoding)
+    return parser
+
+
+def create_root_node(text, parser_cls, encoding=None):
+    """
+    ``text`` can be str, or bytes encoded by ``encoding``.
+    """
+    if isinstance(text, str):
+        encoding = None
+    return etree.fromstring(text, parser=_get_parser(parser_cls, encoding))
 
 
 class Selector:
@@ -41,15 +84,66 @@ class Selector:
             raise ValueError("Needs either text or root argument")
         self.root = root
 
+    @classmethod
+    def iterparse(cls, source, tag, text_type='xml', **kwargs):
+        """
+        Parse the document incrementally and yield a selector for each element matching ``tag``.
+
+        ``source`` can be a file name, a file object or the bytes of the document.
+        ``tag`` is the name of element, optionally prefixed by the names of its ancestors,
+        e.g. ``'url'``, ``'channel/item'`` or ``'/rss/channel/item'``, ``'*'`` matches any element.
+        The names without namespace match the elements in any namespace.
+
+        The processed elements are cleared as the parsing goes, thus the yielded selector
+        is only valid until the next one is generated.
+        An element nested in another matching element is not cleared until the outer one is processed,
+        thus the outer one is yielded with its whole content.
+        """
+        text_type = _get_text_type(text_type)
+        if isinstance(source, bytes):
+            source = BytesIO(source)
+        if text_type == 'html':
+            kwargs['html'] = True
+        absolute = tag.startswith('/')
+        path = _tag_path_re.findall(tag)
+        name = path[-1]
+        if name == '*':
+            name = None
+        elif not name.startswith('{'):
+            name = '{*}' + name
+        ancestors = path[:-1]
+        # the matching elements which are not ended yet
+        pending = 0
+        for event, elem in etree.iterparse(source, events=('start', 'end'), tag=name, **kwargs):
+            matched = _match_ancestors(elem, ancestors, absolute)
+            if event == 'start':
+                if matched:
+                    pending += 1
+                continue
+            if matched:
+                pending -= 1
+                yield cls(root=elem, text_type=text_type)
+            if pending > 0:
+                # the element is a part of a pending match
+                continue
+            elem.clear(keep_tail=True)
+            # remove the processed siblings
+            parent = elem.getparent()
+            if parent is not None:
+                while elem.getprevious() is not None:
+                    del parent[0]
+
     def xpath(self, xpath, **kwargs):
-        kwargs.setdefault('smart_strings', False)
-        res = self.root.xpath(xpath, **kwargs)
-        if not isinstance(res, list):
-            res = [res]
-        return SelectorList([self.__class__(root=i) for i in res])
+        """
+        The compiled XPath expressions are cached and shared across selectors,
+        the keyword arguments except for ``namespaces``, ``regexp``, ``smart_strings`` and ``extensions``
+        are passed as XPath variables.
+        """
+        res = _evaluate_xpath(self.root, xpath, **kwargs)
+        return SelectorList([self.__class__(root=i, text_type=self.type) for i in res])
 
     def css(self, css, **kwargs):
-        xpath = self._css_translator.css_to_xpath(css)
+        xpath = _css_to_xpath(self.type, css)
         return self.xpath(xpath, **kwargs)
 
     @property
@@ -61,16 +155,101 @@ class Selector:
 
     @property
     def text(self):
-        try:
-            return etree.tostring(self.root, encoding="unicode", method="text", with_tail=False)
-        except TypeError:
-            return str(self.root)
+        return _node_text(self.root)
 
     def attr(self, name):
+        if ':' not in name and isinstance(self.root, etree._Element):
+            return self.root.get(name)
         res = self.xpath('@' + name)
         if len(res) > 0:
             return res[0].text
 
+    def getall(self, xpath, **kwargs):
+        """
+        Return the text of the nodes selected by the XPath expression.
+        """
+        return [_node_text(i) for i in _evaluate_xpath(self.root, xpath, **kwargs)]
+
+    def get(self, xpath, default=None, **kwargs):
+        """
+        Return the text of the first node selected by the XPath expression.
+        """
+        res = _evaluate_xpath(self.root, xpath, **kwargs)
+        if len(res) > 0:
+            return _node_text(res[0])
+        return default
+
+    def re(self, regex, xpath=None, **kwargs):
+        """
+        Apply the regular expression to the text of the node, or the text of the nodes selected by ``xpath``.
+        """
+        if xpath is None:
+            return _extract_regex(regex, self.text)
+        res = []
+        for t in self.getall(xpath, **kwargs):
+            res += _extract_regex(regex, t)
+        return res
+
+
+def _evaluate_xpath(root, xpath, namespaces=None, regexp=True, smart_strings=False, extensions=None, **variables):
+    if extensions is None:
+        evaluator = _get_xpath_evaluator(xpath, namespaces=namespaces, regexp=regexp, smart_strings=smart_strings)
+        res = evaluator(root, **variables)
+    else:
+        res = root.xpath(xpath, namespaces=namespaces, regexp=regexp, smart_strings=smart_strings,
+                         extensions=extensions, **variables)
+    if not isinstance(res, list):
+        res = [res]
+    return res
+
+
+def _node_text(node):
+    if isinstance(node, str):
+        return node
+    try:
+        return etree.tostring(node, encoding="unicode", method="text", with_tail=False)
+    except TypeError:
+        return str(node)
+
+
+def _extract_regex(regex, text):
+    if isinstance(regex, str):
+        regex = _compile_regex(regex)
+    res = []
+    for m in regex.finditer(text):
+        groups = m.groups()
+        if len(groups) == 0:
+            res.append(m.group())
+        else:
+            res.extend(g for g in groups if g is not None)
+    return res
+
+
+@lru_cache(maxsize=1024)
+def _compile_regex(regex):
+    return re.compile(regex)
+
+
+_tag_path_re = re.compile(r'\{[^}]*\}[^/]+|[^/]+')
+
+
+def _match_tag(tag, name):
+    if name == '*':
+        return True
+    if name.startswith('{'):
+        return tag == name
+    return tag.rsplit('}', 1)[-1] == name
+
+
+def _match_ancestors(elem, ancestors, absolute):
+    for name in reversed(ancestors):
+        elem = elem.getparent()
+        if elem is None or not _match_tag(elem.tag, name):
+            return False
+    if absolute:
+        return elem.getparent() is None
+    return True
+
 
 class SelectorList(list):
     def __getitem__(self, item):
@@ -99,3 +278,48 @@ class SelectorList(list):
 
     def attr(self, name):
         return [i.attr(name) for i in self]
+
+    def getall(self, xpath, **kwargs):
+        """
+        Evaluate the XPath expression over all the nodes and return the text of the selected nodes.
+        """
+        res = []
+        for i in self:
+            for j in _evaluate_xpath(i.root, xpath, **kwargs):
+                res.append(_node_text(j))
+        return res
+
+    def get(self, xpath, default=None, **kwargs):
+        for i in self:
+            res = _evaluate_xpath(i.root, xpath, **kwargs)
+            if len(res) > 0:
+                return _node_text(res[0])
+        return default
+
+    def re(self, regex, xpath=None, **kwargs):
+        res = []
+        if xpath is None:
+            for i in self:
+                res += _extract_regex(regex, _node_text(i.root))
+        else:
+            for t in self.getall(xpath, **kwargs):
+                res += _extract_regex(regex, t)
+        return res
+
+    def attrs(self, name):
+        """
+        Return the attribute of each node, ``None`` if the node has no such attribute.
+        """
+        if ':' in name:
+            return self.attr(name)
+        return [i.root.get(name) if isinstance(i.root, etree._Element) else None for i in self]
+
+    def extract_table(self, row_xpath='.//tr', cell_xpath='./th|./td', **kwargs):
+        """
+        Return the text of cells row by row, e.g. ``[['name', 'price'], ['apple', '1.0']]``.
+        """
+        rows = []
+        for i in self:
+            for row in _evaluate_xpath(i.root, row_xpath, **kwargs):
+                rows.append([_node_text(c) for c in _evaluate_xpath(row, cell_xpath, **kwargs)])
+        return rows
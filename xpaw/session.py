@@ -0,0 +1,160 @@
+# coding=utf-8
+
+import logging
+import asyncio
+from asyncio import CancelledError
+from collections import deque
+
+from .config import Config, DEFAULT_CONFIG
+from .crawler import Crawler
+from .spider import Spider
+from .http import HttpRequest
+from . import events
+
+log = logging.getLogger(__name__)
+
+
+class SessionSpider(Spider):
+    def start_requests(self):
+        pass
+
+    def parse(self, response):
+        pass
+
+
+class Session:
+    """
+    Make requests from asyncio code, the downloader, its connection pool and the extensions
+    are created once and reused by all the requests of the session.
+    """
+
+    def __init__(self, **kwargs):
+        config = Config(DEFAULT_CONFIG)
+        config.update(kwargs)
+        if config.get('spider') is None:
+            config['spider'] = SessionSpider
+        self.crawler = Crawler(config)
+        self._opened = False
+        self._closed = False
+
+    async def __aenter__(self):
+        await self.open()
+        return self
+
+    async def __aexit__(self, exc_type, exc_val, exc_tb):
+        await self.close()
+
+    async def open(self):
+        if self._closed:
+            raise RuntimeError('Session is closed')
+        if not self._opened:
+            self._opened = True
+            await self.crawler.event_bus.send(events.crawler_start)
+
+    async def close(self):
+        if self._opened and not self._closed:
+            self._closed = True
+            event_bus = self.crawler.event_bus
+            await event_bus.flush()
+            await event_bus.send(events.crawler_shutdown)
+            await event_bus.flush()
+            event_bus.close()
+
+    async def fetch(self, request):
+        """
+        Return the response of the request, or raise the error.
+        """
+        if isinstance(request, str):
+            request = HttpRequest(request)
+        await self.open()
+        return await self.crawler.download(request)
+
+    async def fetch_many(self, requests, max_in_flight=None):
+        """
+        Return a list of results corresponding to the requests, each result is a response or an error.
+        """
+        requests = list(requests)
+        results = [None] * len(requests)
+        async for i, res in self.as_completed(requests, max_in_flight=max_in_flight):
+            results[i] = res
+        return results
+
+    def as_completed(self, requests, max_in_flight=None):
+        """
+        Return an asynchronous iterator of ``(index, result)`` in the order of completion,
+        the requests are taken lazily and at most ``max_in_flight`` requests are downloaded at the same time.
+        """
+        if max_in_flight is None:
+            max_in_flight = self.crawler.downloader.max_clients
+        return AsCompleted(self, requests, max_in_flight)
+
+    async def _fetch_indexed(self, index, request):
+        try:
+            res = await self.fetch(request)
+        except CancelledError:
+            raise
+        except Exception as e:
+            res = e
+        return index, res
+
+
+class AsCompleted:
+    def __init__(self, session, requests, max_in_flight):
+        if max_in_flight <= 0:
+            raise ValueError('max_in_flight must be greater than 0')
+        self._session = session
+        self._requests = iter(requests)
+        self._max_in_flight = max_in_flight
+        self._index = 0
+        self._exhausted = False
+        self._pending = set()
+        self._done = deque()
+
+    def __aiter__(self):
+        return self
+
+    async def __anext__(self):
+        self._fill()
+        while not self._done:
+            if not self._pending:
+                raise StopAsyncIteration
+            done, self._pending = await asyncio.wait(self._pending, return_when=asyncio.FIRST_COMPLETED)
+            for f in done:
+                self._done.append(f.result())
+            self._fill()
+        return self._done.popleft()
+
+    def cancel(self):
+        """
+        Cancel the requests being downloaded and stop taking new requests.
+        """
+        self._exhausted = True
+        pending = self._pending
+        for f in pending:
+            f.cancel()
+        self._pending = set()
+        return pending
+
+    async def aclose(self):
+        """
+        Cancel the requests being downloaded and wait until they are cancelled.
+        """
+        pending = self.cancel()
+        if pending:
+            await asyncio.wait(pending)
+
+    def _fill(self):
+        while not self._exhausted and len(self._pending) < self._max_in_flight:
+            try:
+                r = next(self._requests)
+            except StopIteration:
+                self._exhausted = True
+                break
+            i = self._index
+            self._index += 1
+            if isinstance(r, str):
+                r = HttpRequest(r)
+            if not isinstance(r, HttpRequest):
+                log.warning('Requests must be str or HttpRequest, got %s', type(r).__name__)
+                continue
+            self._pending.add(asyncio.ensure_future(self._session._fetch_indexed(i, r)))
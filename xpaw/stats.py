@@ -1,9 +1,174 @@
 # coding=utf-8
 
+import time
+import math
+from urllib.parse import urlsplit
+
+from .utils import with_not_none_params
+
+
+class RateCounter:
+    """
+    Count the values in a sliding window of ``window`` seconds, which is divided into buckets of ``resolution`` seconds,
+    thus the memory is fixed no matter how many values are added.
+    """
+
+    def __init__(self, window=60, resolution=1):
+        if resolution <= 0:
+            raise ValueError('resolution must be greater than 0')
+        if window < resolution:
+            raise ValueError('window must be greater than or equal to resolution')
+        self.window = window
+        self.resolution = resolution
+        self.total = 0
+        self._buckets = [0] * int(math.ceil(window / resolution))
+        self._start = time.monotonic()
+        self._current = int(self._start / resolution)
+
+    def add(self, value=1, now=None):
+        if now is None:
+            now = time.monotonic()
+        self._advance(now)
+        self._buckets[self._current % len(self._buckets)] += value
+        self.total += value
+
+    def rate(self, period=None, now=None):
+        """
+        Return the average rate per second in the last ``period`` seconds, which is at most ``window`` seconds.
+        """
+        if now is None:
+            now = time.monotonic()
+        self._advance(now)
+        if period is None or period > self.window:
+            period = self.window
+        n = len(self._buckets)
+        k = min(n, int(math.ceil(period / self.resolution)))
+        count = 0
+        for i in range(k):
+            count += self._buckets[(self._current - i) % n]
+        # the current bucket is partially elapsed
+        elapsed = (k - 1) * self.resolution + now - self._current * self.resolution
+        elapsed = min(elapsed, now - self._start)
+        if elapsed <= 0:
+            return 0
+        return count / elapsed
+
+    def _advance(self, now):
+        t = int(now / self.resolution)
+        if t <= self._current:
+            return
+        n = len(self._buckets)
+        for i in range(self._current + 1, self._current + 1 + min(t - self._current, n)):
+            self._buckets[i % n] = 0
+        self._current = t
+
+
+class Histogram:
+    """
+    Log-bucketed histogram, the values in the bucket ``i`` are in the range ``(gamma ** (i - 1), gamma ** i]``,
+    where ``gamma = (1 + precision) / (1 - precision)``, thus the relative error of percentiles is at most ``precision``.
+    The values not greater than ``min_value`` are counted in a single bucket.
+
+    The number of buckets only depends on the range of values, e.g. about 2000 buckets from 1ns to 1000s,
+    and the histograms of the same precision can be merged.
+    """
+
+    def __init__(self, precision=0.01, min_value=1e-9):
+        if not 0 < precision < 1:
+            raise ValueError('precision must be in the range (0, 1)')
+        self.precision = precision
+        self.min_value = min_value
+        self.count = 0
+        self.sum = 0
+        self.min = None
+        self.max = None
+        self._gamma = (1 + precision) / (1 - precision)
+        self._log_gamma = math.log(self._gamma)
+        self._buckets = {}
+        self._zero_count = 0
+
+    def __len__(self):
+        return self.count
+
+    def __repr__(self):
+        return '<{} count={}, mean={}, p50={}, p95={}, p99={}, max={}>'.format(
+            self.__class__.__name__, self.count, self.mean, self.percentile(50), self.percentile(95),
+            self.percentile(99), self.max)
+
+    @property
+    def mean(self):
+        if self.count == 0:
+            return None
+        return self.sum / self.count
+
+    def record(self, value):
+        if value <= self.min_value:
+            self._zero_count += 1
+        else:
+            i = int(math.ceil(math.log(value) / self._log_gamma))
+            self._buckets[i] = self._buckets.get(i, 0) + 1
+        self.count += 1
+        self.sum += value
+        if self.min is None or value < self.min:
+            self.min = value
+        if self.max is None or value > self.max:
+            self.max = value
+
+    def percentile(self, p):
+        if self.count == 0:
+            return None
+        rank = p / 100 * (self.count - 1)
+        if rank >= self.count - 1:
+            return self.max
+        n = self._zero_count
+        if rank < n:
+            return self.min
+        for i in sorted(self._buckets):
+            n += self._buckets[i]
+            if rank < n:
+                # the value which has the same relative error to both bounds of the bucket
+                v = 2 * self._gamma ** i / (self._gamma + 1)
+                return min(max(v, self.min), self.max)
+        return self.max
+
+    def merge(self, other):
+        if other.precision != self.precision or other.min_value != self.min_value:
+            raise ValueError('Cannot merge the histograms of different precision')
+        for i, c in other._buckets.items():
+            self._buckets[i] = self._buckets.get(i, 0) + c
+        self._zero_count += other._zero_count
+        self.count += other.count
+        self.sum += other.sum
+        if other.min is not None and (self.min is None or other.min < self.min):
+            self.min = other.min
+        if other.max is not None and (self.max is None or other.max > self.max):
+            self.max = other.max
+
+    def summary(self):
+        return {'count': self.count, 'mean': self.mean, 'p50': self.percentile(50),
+                'p95': self.percentile(95), 'p99': self.percentile(99), 'max': self.max}
+
 
 class StatsCollector:
-    def __init__(self):
+    """
+    Besides the scalar stats, the rates of the values marked by ``mark`` are kept in windowed rate counters,
+    and the distributions of the values observed by ``observe`` are kept in histograms.
+    The per host keys are limited to the first ``max_hosts`` hosts, see ``host_key``.
+    """
+
+    rate_window = 60
+    histogram_precision = 0.01
+
+    def __init__(self, max_hosts=100):
+        self.max_hosts = max_hosts
         self._stats = {}
+        self._rates = {}
+        self._histograms = {}
+        self._hosts = set()
+
+    @classmethod
+    def from_crawler(cls, crawler):
+        return cls(**with_not_none_params(max_hosts=crawler.config.getint('stats_max_hosts')))
 
     def get(self, key, default=None):
         return self._stats.get(key, default)
@@ -23,8 +188,57 @@ class StatsCollector:
     def inc(self, key, value=1, start=0):
         self._stats[key] = self._stats.setdefault(key, start) + value
 
+    def mark(self, key, value=1):
+        c = self._rates.get(key)
+        if c is None:
+            c = self._rates[key] = RateCounter(self.rate_window)
+        c.add(value)
+
+    def get_rate(self, key, period=None):
+        """
+        Return the rate per second of the key in the last ``period`` seconds.
+        """
+        c = self._rates.get(key)
+        if c is None:
+            return 0
+        return c.rate(period)
+
+    @property
+    def rates(self):
+        return self._rates
+
+    def observe(self, key, value):
+        h = self._histograms.get(key)
+        if h is None:
+            h = self._histograms[key] = Histogram(self.histogram_precision)
+        h.record(value)
+
+    def get_histogram(self, key):
+        return self._histograms.get(key)
+
+    @property
+    def histograms(self):
+        return self._histograms
+
+    def host_key(self, key, url):
+        """
+        Return the per host key like ``key/example.com``,
+        or ``None`` if the URL has no host or there are already ``max_hosts`` other hosts.
+        """
+        host = urlsplit(url).hostname
+        if not host:
+            return None
+        if host not in self._hosts:
+            if len(self._hosts) >= self.max_hosts:
+                return None
+            self._hosts.add(host)
+        return '{}/{}'.format(key, host)
+
     def clear(self):
         self._stats.clear()
+        self._rates.clear()
+        self._histograms.clear()
+        self._hosts.clear()
 
     def remove(self, key):
         if key in self._stats:
@@ -57,5 +271,11 @@ class DummyStatsCollector(StatsCollector):
     def inc(self, key, value=1, start=0):
         pass
 
+    def mark(self, key, value=1):
+        pass
+
+    def observe(self, key, value):
+        pass
+
     def set_stats(self, stats):
         pass
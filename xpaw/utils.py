@@ -5,11 +5,12 @@ import re
 import sys
 import hashlib
 import logging
+import sqlite3
 from importlib import import_module
 import string
 from os.path import isfile
 from urllib.parse import urlsplit, parse_qsl, urlencode, parse_qs
-import cgi
+import codecs
 
 from tornado.httputil import url_concat
 
@@ -149,20 +150,41 @@ def iter_settings(config):
 
 def get_encoding_from_content_type(content_type):
     if content_type:
-        content_type, params = cgi.parse_header(content_type)
-        if "charset" in params:
-            return params["charset"]
+        for param in content_type.split(';')[1:]:
+            key, sep, value = param.partition('=')
+            if sep and key.strip().lower() == 'charset':
+                value = value.strip().strip('"\'').strip()
+                if value:
+                    return value
+
+
+_boms = ((codecs.BOM_UTF8, 'utf-8'),
+         (codecs.BOM_UTF32_LE, 'utf-32'),
+         (codecs.BOM_UTF32_BE, 'utf-32'),
+         (codecs.BOM_UTF16_LE, 'utf-16'),
+         (codecs.BOM_UTF16_BE, 'utf-16'))
+
+
+def get_encoding_from_bom(content):
+    for bom, encoding in _boms:
+        if content.startswith(bom):
+            return encoding
 
 
 _charset_flag = re.compile(r"""<meta.*?charset=["']*(.+?)["'>]""", flags=re.I)
 _pragma_flag = re.compile(r"""<meta.*?content=["']*;?charset=(.+?)["'>]""", flags=re.I)
 _xml_flag = re.compile(r"""^<\?xml.*?encoding=["']*(.+?)["'>]""")
 
+# the size of prefix scanned for the declared encoding
+ENCODING_SCAN_SIZE = 4096
+
 
-def get_encoding_from_content(content):
+def get_encoding_from_content(content, max_size=ENCODING_SCAN_SIZE):
     if isinstance(content, bytes):
-        content = content.decode("ascii", errors="ignore")
-    elif not isinstance(content, str):
+        content = content[:max_size].decode("ascii", errors="ignore")
+    elif isinstance(content, str):
+        content = content[:max_size]
+    else:
         raise ValueError("content should be bytes or str")
     s = _charset_flag.search(content)
     if s:
@@ -175,6 +197,58 @@ def get_encoding_from_content(content):
         return s.group(1).strip()
 
 
+try:
+    import cchardet as chardet
+except ImportError:
+    try:
+        import chardet
+    except ImportError:
+        chardet = None
+
+# the size of prefix given to the charset detector
+CHARDET_SIZE = 65536
+
+
+def _is_known_encoding(encoding):
+    try:
+        codecs.lookup(encoding)
+    except LookupError:
+        return False
+    return True
+
+
+def _is_utf8(content):
+    try:
+        # the prefix may end in the middle of a character
+        codecs.getincrementaldecoder('utf-8')().decode(content, final=False)
+    except UnicodeDecodeError:
+        return False
+    return True
+
+
+def detect_encoding(content, content_type=None):
+    """
+    Detect the encoding of bytes by BOM, Content-Type, the declaration in the beginning of content,
+    and at last guess it by a charset detector if the beginning of content is not UTF-8.
+    """
+    if content:
+        encoding = get_encoding_from_bom(content)
+        if encoding:
+            return encoding
+    encoding = get_encoding_from_content_type(content_type)
+    if encoding and _is_known_encoding(encoding):
+        return encoding
+    if content:
+        encoding = get_encoding_from_content(content)
+        if encoding and _is_known_encoding(encoding):
+            return encoding
+        if not _is_utf8(content[:ENCODING_SCAN_SIZE]) and chardet is not None:
+            encoding = chardet.detect(content[:CHARDET_SIZE]).get('encoding')
+            if encoding and _is_known_encoding(encoding):
+                return encoding
+    return 'utf-8'
+
+
 def make_url(url, params=None):
     args = []
     if isinstance(params, dict):
@@ -204,3 +278,14 @@ def with_not_none_params(**kwargs):
 
 def isiterable(obj):
     return hasattr(obj, "__iter__") or hasattr(obj, "__aiter__")
+
+
+def open_sqlite(path):
+    """
+    Open a SQLite database in WAL mode, which allows reading while writing,
+    and the data is synced to disk only at checkpoints.
+    """
+    conn = sqlite3.connect(path)
+    conn.execute('PRAGMA journal_mode=WAL')
+    conn.execute('PRAGMA synchronous=NORMAL')
+    return conn